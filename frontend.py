@@ -1,15 +1,45 @@
+import os
 import streamlit as st
 import requests
-import base64
-import urllib.parse
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 st.set_page_config(page_title="Simple Social", layout="wide")
 
+# Backend location and feed paging configuration
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000").rstrip("/")
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", 10))
+FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", 30))  # seconds before a cached page is revalidated
+
 # Initialize session state
 if 'token' not in st.session_state:
     st.session_state.token = None
 if 'user' not in st.session_state:
     st.session_state.user = None
+if 'feed_version' not in st.session_state:
+    st.session_state.feed_version = 0      # bumped whenever this user changes the feed
+if 'feed_validators' not in st.session_state:
+    st.session_state.feed_validators = {}  # cursor -> (etag, page)
+if 'feed_pages_shown' not in st.session_state:
+    st.session_state.feed_pages_shown = 1
+
+
+def api_url(path):
+    """Build an absolute URL for an API path"""
+    return f"{API_BASE_URL}{path}"
+
+
+def get_http():
+    """One pooled, keep-alive HTTP session per Streamlit user session"""
+    if 'http' not in st.session_state:
+        session = requests.Session()
+        # Retry idempotent reads on transient connection failures only
+        retry = Retry(total=2, backoff_factor=0.3, allowed_methods={"GET"}, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        st.session_state.http = session
+    return st.session_state.http
 
 
 def get_headers():
@@ -19,6 +49,51 @@ def get_headers():
     return {}
 
 
+def invalidate_feed():
+    """Force cached feed pages to be revalidated on the next render"""
+    st.session_state.feed_version += 1
+
+
+@st.cache_data(ttl=FEED_CACHE_TTL, max_entries=256, show_spinner=False)
+def fetch_feed_page(_http, token, cursor, limit, version, etag=None):
+    """
+    Fetch one feed page, cached per (token, cursor, limit, version, etag).
+    Sends If-None-Match so an unchanged page costs a 304 instead of a full body.
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    if etag:
+        headers["If-None-Match"] = etag
+
+    params = {"limit": limit}
+    if cursor:
+        params["cursor"] = cursor
+
+    response = _http.get(api_url("/api/v1/feed/"), params=params, headers=headers, timeout=10)
+
+    if response.status_code == 304:
+        return {"status": 304, "etag": etag, "page": None}
+
+    # Errors raise, so they are never cached
+    response.raise_for_status()
+    return {"status": 200, "etag": response.headers.get("ETag"), "page": response.json()}
+
+
+def load_feed_page(cursor):
+    """Load a feed page, reusing the last copy when the server reports it unchanged"""
+    validators = st.session_state.feed_validators
+    known_etag, known_page = validators.get(cursor, (None, None))
+
+    result = fetch_feed_page(
+        get_http(), st.session_state.token, cursor, FEED_PAGE_SIZE, st.session_state.feed_version, known_etag
+    )
+
+    if result["status"] == 304 and known_page is not None:
+        return known_page
+
+    validators[cursor] = (result["etag"], result["page"])
+    return result["page"]
+
+
 def login_page():
     st.title("🚀 Welcome to Simple Social")
 
@@ -33,14 +108,14 @@ def login_page():
             if st.button("Login", type="primary", use_container_width=True):
                 # Login using FastAPI Users JWT endpoint
                 login_data = {"username": email, "password": password}
-                response = requests.post("http://localhost:8000/api/v1/auth/login", data=login_data)
+                response = get_http().post(api_url("/api/v1/auth/login"), data=login_data)
 
                 if response.status_code == 200:
                     token_data = response.json()
                     st.session_state.token = token_data["access_token"]
 
                     # Get user info
-                    user_response = requests.get("http://localhost:8000/api/v1/users/me", headers=get_headers())
+                    user_response = get_http().get(api_url("/api/v1/users/me"), headers=get_headers())
                     if user_response.status_code == 200:
                         st.session_state.user = user_response.json()
                         st.rerun()
@@ -53,7 +128,7 @@ def login_page():
             if st.button("Sign Up", type="secondary", use_container_width=True):
                 # Register using FastAPI Users
                 signup_data = {"email": email, "password": password}
-                response = requests.post("http://localhost:8000/api/v1/auth/register", json=signup_data)
+                response = get_http().post(api_url("/api/v1/auth/register"), json=signup_data)
 
                 if response.status_code == 201:
                     st.success("Account created! Click Login now.")
@@ -67,93 +142,86 @@ def login_page():
 def upload_page():
     st.title("📸 Share Something")
 
-    uploaded_file = st.file_uploader("Choose media", type=['png', 'jpg', 'jpeg', 'mp4', 'avi', 'mov', 'mkv', 'webm'])
+    uploaded_file = st.file_uploader("Choose media", type=['png', 'jpg', 'jpeg', 'mp4', 'mov', 'mkv', 'webm'])
     caption = st.text_area("Caption:", placeholder="What's on your mind?")
 
     if uploaded_file and st.button("Share", type="primary"):
         with st.spinner("Uploading..."):
             files = {"file": (uploaded_file.name, uploaded_file.getvalue(), uploaded_file.type)}
             data = {"caption": caption}
-            response = requests.post("http://localhost:8000/api/v1/posts/upload", files=files, data=data, headers=get_headers())
+            response = get_http().post(api_url("/api/v1/posts/upload"), files=files, data=data, headers=get_headers())
 
             if response.status_code == 200:
                 st.success("Posted!")
+                invalidate_feed()
                 st.rerun()
+            elif response.status_code in (413, 415):
+                st.error(response.json().get("detail", "Upload rejected"))
             else:
                 st.error("Upload failed!")
 
 
-def encode_text_for_overlay(text):
-    """Encode text for ImageKit overlay - base64 then URL encode"""
-    if not text:
-        return ""
-    # Base64 encode the text
-    base64_text = base64.b64encode(text.encode('utf-8')).decode('utf-8')
-    # URL encode the result
-    return urllib.parse.quote(base64_text)
-
+def render_post(post):
+    st.markdown("---")
 
-def create_transformed_url(original_url, transformation_params, caption=None):
-    if caption:
-        encoded_caption = encode_text_for_overlay(caption)
-        # Add text overlay at bottom with semi-transparent background
-        text_overlay = f"l-text,ie-{encoded_caption},ly-N20,lx-20,fs-100,co-white,bg-000000A0,l-end"
-        transformation_params = text_overlay
-
-    if not transformation_params:
-        return original_url
-
-    parts = original_url.split("/")
+    # Header with user, date, and delete button (if owner)
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.markdown(f"**{post['email']}** • {post['created_at'][:10]}")
+    with col2:
+        if post.get('is_owner', False):
+            if st.button("🗑️", key=f"delete_{post['id']}", help="Delete post"):
+                # Delete the post
+                response = get_http().delete(api_url(f"/api/v1/posts/{post['id']}"), headers=get_headers())
+                if response.status_code == 200:
+                    st.success("Post deleted!")
+                    invalidate_feed()
+                    st.rerun()
+                else:
+                    st.error("Failed to delete post!")
+
+    # Uniform media display using the renditions precomputed by the API
+    caption = post.get('caption', '')
+    variants = post.get('variants', {})
+    if post['file_type'] == 'image':
+        # Image feed rendition already carries the caption overlay
+        st.image(variants.get('feed', post['url']), width=300)
+    else:
+        # Video feed rendition is padded to a uniform size
+        st.video(variants.get('feed', post['url']), width=300)
+        st.caption(caption)
 
-    imagekit_id = parts[3]
-    file_path = "/".join(parts[4:])
-    base_url = "/".join(parts[:4])
-    return f"{base_url}/tr:{transformation_params}/{file_path}"
+    st.markdown("")  # Space between posts
 
 
 def feed_page():
     st.title("🏠 Feed")
 
-    response = requests.get("http://localhost:8000/api/v1/feed", headers=get_headers())
-    if response.status_code == 200:
-        posts = response.json()["posts"]
-
-        if not posts:
-            st.info("No posts yet! Be the first to share something.")
+    # Only the pages the user asked for are fetched and rendered
+    cursor = None
+    rendered = 0
+    for _ in range(st.session_state.feed_pages_shown):
+        try:
+            page = load_feed_page(cursor)
+        except requests.RequestException:
+            st.error("Failed to load feed")
             return
 
-        for post in posts:
-            st.markdown("---")
-
-            # Header with user, date, and delete button (if owner)
-            col1, col2 = st.columns([4, 1])
-            with col1:
-                st.markdown(f"**{post['email']}** • {post['created_at'][:10]}")
-            with col2:
-                if post.get('is_owner', False):
-                    if st.button("🗑️", key=f"delete_{post['id']}", help="Delete post"):
-                        # Delete the post
-                        response = requests.delete(f"http://localhost:8000/api/v1/posts/{post['id']}", headers=get_headers())
-                        if response.status_code == 200:
-                            st.success("Post deleted!")
-                            st.rerun()
-                        else:
-                            st.error("Failed to delete post!")
-
-            # Uniform media display with caption overlay
-            caption = post.get('caption', '')
-            if post['file_type'] == 'image':
-                uniform_url = create_transformed_url(post['url'], "", caption)
-                st.image(uniform_url, width=300)
-            else:
-                # For videos: specify only height to maintain aspect ratio + caption overlay
-                uniform_video_url = create_transformed_url(post['url'], "w-400,h-200,cm-pad_resize,bg-blurred")
-                st.video(uniform_video_url, width=300)
-                st.caption(caption)
+        for post in page["posts"]:
+            render_post(post)
+            rendered += 1
 
-            st.markdown("")  # Space between posts
-    else:
-        st.error("Failed to load feed")
+        cursor = page.get("next_cursor")
+        if not cursor:
+            break
+
+    if rendered == 0:
+        st.info("No posts yet! Be the first to share something.")
+        return
+
+    if cursor and st.button("Load more", use_container_width=True):
+        st.session_state.feed_pages_shown += 1
+        st.rerun()
 
 
 # Main app logic
@@ -166,6 +234,8 @@ else:
     if st.sidebar.button("Logout"):
         st.session_state.user = None
         st.session_state.token = None
+        st.session_state.feed_validators = {}
+        st.session_state.feed_pages_shown = 1
         st.rerun()
 
     st.sidebar.markdown("---")
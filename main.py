@@ -1,22 +1,160 @@
 """
 Application entrypoint for local development and deployments.
 
-For production environments, prefer running the app using a process
-manager such as Gunicorn with Uvicorn workers.
+APPLICATION_MODE=development (default) runs a single reloadable process.
+APPLICATION_MODE=production runs a supervised pool of Uvicorn workers
+with uvloop/httptools, connection tuning, jittered worker recycling and
+graceful draining of in-flight requests on SIGTERM.
 """
 import os
+import random
+import importlib.util
 import uvicorn
+from uvicorn.supervisors import Multiprocess
+
+APP_PATH = "src.VideoSharingApp.app:app"
+
+
+def env_flag(name: str, default: str = "false") -> bool:
+    return os.getenv(name, default).lower().strip() == "true"
+
+
+def resolve_workers() -> int:
+    """
+    Worker count from WORKERS, defaulting to the number of CPUs.
+    """
+    workers = int(os.getenv("WORKERS", os.cpu_count() or 1))
+
+    if workers < 1:
+        raise RuntimeError("WORKERS must be at least 1. Check environment configurations.")
+
+    return workers
+
+
+def select_loop() -> str:
+    """
+    Prefer uvloop when it is installed (not available on Windows).
+    """
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def select_http() -> str:
+    """
+    Prefer the httptools HTTP parser when it is installed.
+    """
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def check_multiworker_safety(workers: int) -> None:
+    """
+    Refuse to start several workers with settings that are only safe in a single process.
+
+    Raises:
+    - RuntimeError: If the configuration would misbehave across processes.
+    """
+    if workers == 1:
+        return
+
+    from VideoSharingApp.core.dependencies import get_database_url, get_sqlite_journal_mode
+
+    database_url = get_database_url()
+
+    if database_url.startswith("sqlite"):
+        if ":memory:" in database_url:
+            raise RuntimeError("In-memory SQLite cannot be shared between workers. Use WORKERS=1.")
+
+        if get_sqlite_journal_mode() != "wal":
+            raise RuntimeError(
+                "SQLite without WAL serializes readers behind writers across workers. "
+                "Set SQLITE_JOURNAL_MODE=wal or use WORKERS=1."
+            )
+
+    if not os.getenv("EVENTS_BROADCAST_URL", "").strip():
+        raise RuntimeError(
+            "Feed events are delivered in-process only, so clients connected to one worker "
+            "would miss posts handled by another. Set EVENTS_BROADCAST_URL or use WORKERS=1."
+        )
+
+
+class RecyclingServer(uvicorn.Server):
+    """
+    Uvicorn server whose request limit is jittered per worker process,
+    so workers started together do not all restart at the same moment.
+    """
+    def __init__(self, config: uvicorn.Config, max_requests_jitter: int = 0) -> None:
+        super().__init__(config)
+        self.max_requests = config.limit_max_requests
+        self.max_requests_jitter = max_requests_jitter
+
+    def run(self, sockets=None) -> None:
+        if self.max_requests:
+            # SystemRandom: forked workers share the parent's `random` state
+            jitter = random.SystemRandom().randint(0, self.max_requests_jitter)
+            self.config.limit_max_requests = self.max_requests + jitter
+
+        super().run(sockets=sockets)
+
+    async def shutdown(self, sockets=None) -> None:
+        # Feed streams never finish on their own and would hold up draining
+        from VideoSharingApp.core.events import close_all_streams
+
+        close_all_streams()
+        await super().shutdown(sockets=sockets)
+
+
+def run_production() -> None:
+    """
+    Run a supervised pool of workers. Configuration is driven via env variables.
+
+    Dead or recycled workers are restarted by the supervisor. On SIGTERM,
+    each worker stops accepting connections, ends its feed streams and
+    waits for in-flight requests (e.g. uploads) to finish, up to
+    GRACEFUL_SHUTDOWN_TIMEOUT (default 30s) before cancelling them.
+    """
+    workers = resolve_workers()
+    check_multiworker_safety(workers)
+
+    max_requests = int(os.getenv("MAX_REQUESTS", 0)) or None
+    graceful_timeout = int(os.getenv("GRACEFUL_SHUTDOWN_TIMEOUT", 30))
+
+    if graceful_timeout < 1:
+        raise RuntimeError("GRACEFUL_SHUTDOWN_TIMEOUT must be at least 1 second. Check environment configurations.")
+
+    config = uvicorn.Config(
+        app=APP_PATH,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", 8000)),
+        workers=workers,
+        loop=select_loop(),
+        http=select_http(),
+        backlog=int(os.getenv("BACKLOG", 2048)),
+        timeout_keep_alive=int(os.getenv("KEEP_ALIVE_TIMEOUT", 15)),
+        limit_max_requests=max_requests,
+        timeout_graceful_shutdown=graceful_timeout,
+        proxy_headers=True,
+    )
+
+    server = RecyclingServer(config, max_requests_jitter=int(os.getenv("MAX_REQUESTS_JITTER", 0)))
+
+    # Always supervise, even with one worker, so recycled workers are replaced
+    sock = config.bind_socket()
+    Multiprocess(config, target=server.run, sockets=[sock]).run()
+
 
 def main() -> None:
     """
-    Launch the FastAPI application using Unvicorn.
+    Launch the FastAPI application using Uvicorn.
     Configuration is driven via env variables.
     """
+    if os.getenv("APPLICATION_MODE", "development").lower().strip() == "production":
+        run_production()
+        return None
+
     uvicorn.run(
-        app="src.VideoSharingApp.app:app",
+        app=APP_PATH,
         host=os.getenv("HOST", "0.0.0.0"),
         port=int(os.getenv("PORT", 8000)),
-        reload=os.getenv("APPLICATION_RELOAD", "false").lower().strip() == "true",
+        reload=env_flag("APPLICATION_RELOAD"),
     )
 
     return None
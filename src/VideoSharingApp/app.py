@@ -4,15 +4,25 @@ from VideoSharingApp.schemas import UserRead, UserCreate, UserUpdate
 from VideoSharingApp.users import auth_backend_v1, fastapi_users
 
 from VideoSharingApp.core.lifespan import lifespan
+from VideoSharingApp.core.profiling import ProfilingMiddleware, install_db_timing, profiling_options
+from VideoSharingApp.core.upload_limits import UploadSizeLimitMiddleware
+from VideoSharingApp.database import engine
 from VideoSharingApp.utils.logger import get_logger
 from VideoSharingApp.routers import health          # Validates if a connection has been made to the API (debug)
-from VideoSharingApp.routers.v1 import posts, feed
+from VideoSharingApp.routers.v1 import posts, feed, events, account, stats
 from VideoSharingApp.constants.auth import AuthPaths, APIVersion
 
 logger = get_logger(__name__)
 
 app = FastAPI(lifespan=lifespan)
 
+# Opt-in request profiling (X-Profile header for superusers, or sampling)
+app.add_middleware(ProfilingMiddleware, **profiling_options())
+install_db_timing(engine)
+
+# Reject oversized upload bodies before they are read in full
+app.add_middleware(UploadSizeLimitMiddleware)
+
 # Connecting auth endpoints
 base_prefix = AuthPaths.base_prefix(APIVersion.V1)    #/api/v1
 auth_prefix = AuthPaths.router_prefix(APIVersion.V1)    #/api/v1/auth
@@ -28,3 +38,6 @@ app.include_router(fastapi_users.get_users_router(UserRead, UserUpdate), prefix=
 app.include_router(health.router)
 app.include_router(posts.router, prefix=base_prefix)
 app.include_router(feed.router, prefix=base_prefix)
+app.include_router(events.router, prefix=base_prefix)
+app.include_router(account.router, prefix=base_prefix)
+app.include_router(stats.router, prefix=base_prefix)
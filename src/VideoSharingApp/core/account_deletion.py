@@ -0,0 +1,373 @@
+"""
+Set-based, batched removal of a user's data.
+
+Posts are deleted with `DELETE ... WHERE id IN (...)` in bounded batches,
+each in its own short transaction, so deleting a heavy uploader neither
+loads their posts into memory nor holds the SQLite write lock for long.
+"""
+import os
+import uuid
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select, delete, update, func, or_
+
+from VideoSharingApp.database import async_session_maker, AccountDeletionJob, IdempotencyKey, Post, PostLike, User
+from VideoSharingApp.core.asset_cleanup import AssetCleanupQueue
+from VideoSharingApp.core.counters import CounterBuffer, LIKES
+from VideoSharingApp.core.rollups import record_posts
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+DELETION_BATCH_SIZE = int(os.getenv("DELETION_BATCH_SIZE", 500))
+
+
+async def purge_user_data(
+    user_id: uuid.UUID,
+    batch_size: int = DELETION_BATCH_SIZE,
+    asset_cleanup: Optional[AssetCleanupQueue] = None,
+    counters: Optional[CounterBuffer] = None,
+    on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+) -> int:
+    """
+    Delete every post, like and stored idempotent response owned by a user,
+    one bounded batch at a time.
+
+    Parameters:
+    - user_id (UUID): Owner whose data is removed.
+    - batch_size (int): Rows deleted per transaction.
+    - asset_cleanup (AssetCleanupQueue | None): Receives the remote file ids of deleted posts.
+    - counters (CounterBuffer | None): Receives like-count decrements for posts the user liked.
+    - on_progress (async callable | None): Awaited with the number of posts deleted in each batch.
+
+    Returns:
+    - int: Total number of posts deleted.
+    """
+    deleted_posts = 0
+
+    # Likes the user gave on other posts
+    while True:
+        async with async_session_maker() as session:
+            liked_post_ids = (await session.execute(
+                select(PostLike.post_id).where(PostLike.user_id == user_id).limit(batch_size)
+            )).scalars().all()
+
+            if not liked_post_ids:
+                break
+
+            await session.execute(
+                delete(PostLike).where(PostLike.user_id == user_id, PostLike.post_id.in_(liked_post_ids))
+            )
+            await session.commit()
+
+        if counters is not None:
+            for post_id in liked_post_ids:
+                counters.increment(post_id, LIKES, -1)
+
+    # The user's own posts, and the likes on them
+    while True:
+        async with async_session_maker() as session:
+            rows = (await session.execute(
+                select(Post.id, Post.file_id, Post.user_id, Post.file_type, Post.created_at, Post.size_bytes)
+                .where(Post.user_id == user_id)
+                .limit(batch_size)
+            )).all()
+
+            if not rows:
+                break
+
+            post_ids = [row.id for row in rows]
+
+            await session.execute(delete(PostLike).where(PostLike.post_id.in_(post_ids)))
+            await session.execute(delete(Post).where(Post.id.in_(post_ids)))
+            await record_posts(session, rows, sign=-1)
+            await session.commit()
+
+        deleted_posts += len(rows)
+
+        if asset_cleanup is not None:
+            asset_cleanup.enqueue(row.file_id for row in rows)
+
+        if on_progress is not None:
+            await on_progress(len(rows))
+
+        # Let other requests get at the database between batches
+        await asyncio.sleep(0)
+
+    # Stored responses of the user's idempotent requests. Not left to the FK
+    # cascade: SQLite does not enforce foreign keys here.
+    while True:
+        async with async_session_maker() as session:
+            keys = (await session.execute(
+                select(IdempotencyKey.key).where(IdempotencyKey.user_id == user_id).limit(batch_size)
+            )).scalars().all()
+
+            if not keys:
+                break
+
+            await session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key.in_(keys))
+            )
+            await session.commit()
+
+    return deleted_posts
+
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+UNFINISHED = (PENDING, RUNNING)
+
+
+class AccountDeletionJobs:
+    """
+    Runs account deletions in the background, tracking them in the
+    `account_deletion_jobs` table.
+
+    A worker owns a job while it holds the job's lease, which it renews
+    as it goes. Jobs whose lease has lapsed (worker recycled, deploy,
+    crash) are claimed and resumed by the next worker to poll. Resuming is
+    safe because every batch is committed independently.
+
+    A run that fails (e.g. the database stayed locked) leaves the job
+    unfinished with its lease pushed out by an exponential backoff, so it
+    is retried later. Only after `max_attempts` failed runs is it marked
+    failed, which needs an operator: the user is deactivated and cannot
+    ask again.
+    """
+    def __init__(
+        self,
+        asset_cleanup: AssetCleanupQueue,
+        counters: CounterBuffer,
+        lease_seconds: float = 120,
+        resume_interval: float = 60,
+        max_attempts: int = 5,
+        retry_backoff: float = 30,
+        max_retry_backoff: float = 3600,
+    ) -> None:
+        self._asset_cleanup = asset_cleanup
+        self._counters = counters
+        self._lease = timedelta(seconds=lease_seconds)
+        self._resume_interval = resume_interval
+        self._max_attempts = max(max_attempts, 1)
+        self._retry_backoff = retry_backoff
+        self._max_retry_backoff = max_retry_backoff
+        self._running: dict[uuid.UUID, asyncio.Task] = {}
+        self._resumer: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._resumer = asyncio.create_task(self._resume_loop())
+
+    async def stop(self) -> None:
+        """
+        Stop deletions in progress and release their leases, so they are
+        resumed promptly by another worker or after restart.
+        """
+        if self._resumer is not None:
+            self._resumer.cancel()
+
+        tasks = list(self._running.values())
+        job_ids = list(self._running)
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *(t for t in [self._resumer] if t is not None), return_exceptions=True)
+
+        if job_ids:
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(AccountDeletionJob)
+                    .where(AccountDeletionJob.id.in_(job_ids), AccountDeletionJob.status.in_(UNFINISHED))
+                    .values(lease_expires_at=None)
+                )
+                await session.commit()
+
+            logger.info(f"Released {len(job_ids)} account deletion jobs for resumption.")
+
+    async def schedule(self, user_id: uuid.UUID) -> AccountDeletionJob:
+        """
+        Deactivate the user immediately and schedule removal of their data.
+        """
+        now = datetime.now(timezone.utc)
+
+        async with async_session_maker() as session:
+            await session.execute(update(User).where(User.id == user_id).values(is_active=False))
+
+            total_posts = (await session.execute(
+                select(func.count()).select_from(Post).where(Post.user_id == user_id)
+            )).scalar_one()
+
+            job = AccountDeletionJob(
+                user_id=user_id,
+                status=PENDING,
+                total_posts=total_posts,
+                deleted_posts=0,
+                started_at=now,
+                lease_expires_at=now + self._lease,
+            )
+            session.add(job)
+            await session.commit()
+
+        self._launch(job.id, user_id)
+        return job
+
+    async def get(self, job_id: uuid.UUID) -> Optional[AccountDeletionJob]:
+        async with async_session_maker() as session:
+            return await session.get(AccountDeletionJob, job_id)
+
+    def _launch(self, job_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        task = asyncio.create_task(self._run(job_id, user_id))
+        self._running[job_id] = task
+        task.add_done_callback(lambda _: self._running.pop(job_id, None))
+
+    async def _resume_loop(self) -> None:
+        while True:
+            try:
+                resumed = await self.resume_abandoned()
+                if resumed:
+                    logger.info(f"Resumed {resumed} interrupted account deletion jobs.")
+            except Exception:
+                logger.exception("Failed to resume account deletion jobs.")
+
+            await asyncio.sleep(self._resume_interval)
+
+    async def resume_abandoned(self) -> int:
+        """
+        Claim unfinished jobs nobody holds a lease on, and run them here.
+
+        Returns:
+        - int: Number of jobs claimed.
+        """
+        now = datetime.now(timezone.utc)
+        lapsed = or_(AccountDeletionJob.lease_expires_at.is_(None), AccountDeletionJob.lease_expires_at < now)
+        claimed = 0
+
+        async with async_session_maker() as session:
+            candidates = (await session.execute(
+                select(AccountDeletionJob.id, AccountDeletionJob.user_id)
+                .where(AccountDeletionJob.status.in_(UNFINISHED), lapsed)
+            )).all()
+
+            for job_id, user_id in candidates:
+                if job_id in self._running:
+                    continue
+
+                # Conditional update: only one worker wins each job
+                result = await session.execute(
+                    update(AccountDeletionJob)
+                    .where(AccountDeletionJob.id == job_id, AccountDeletionJob.status.in_(UNFINISHED), lapsed)
+                    .values(lease_expires_at=now + self._lease)
+                )
+                await session.commit()
+
+                if result.rowcount == 1:
+                    self._launch(job_id, user_id)
+                    claimed += 1
+
+        return claimed
+
+    async def _update(self, job_id: uuid.UUID, **values) -> None:
+        async with async_session_maker() as session:
+            await session.execute(update(AccountDeletionJob).where(AccountDeletionJob.id == job_id).values(**values))
+            await session.commit()
+
+    async def _renew_lease(self, job_id: uuid.UUID) -> None:
+        while True:
+            await asyncio.sleep(self._lease.total_seconds() / 3)
+
+            try:
+                await self._update(job_id, lease_expires_at=datetime.now(timezone.utc) + self._lease)
+            except Exception:
+                logger.exception(f"Failed to renew lease of account deletion job {job_id}")
+
+    async def _run(self, job_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        heartbeat = asyncio.create_task(self._renew_lease(job_id))
+
+        async def record_progress(deleted: int) -> None:
+            await self._update(job_id, deleted_posts=AccountDeletionJob.deleted_posts + deleted)
+
+        try:
+            await self._update(job_id, status=RUNNING)
+
+            deleted_posts = await purge_user_data(
+                user_id,
+                asset_cleanup=self._asset_cleanup,
+                counters=self._counters,
+                on_progress=record_progress,
+            )
+
+            async with async_session_maker() as session:
+                await session.execute(delete(User).where(User.id == user_id))
+                await session.execute(
+                    update(AccountDeletionJob)
+                    .where(AccountDeletionJob.id == job_id)
+                    .values(status=COMPLETED, finished_at=datetime.now(timezone.utc), lease_expires_at=None)
+                )
+                await session.commit()
+
+            logger.info("Account deleted", extra={"user_id": str(user_id), "posts": deleted_posts})
+
+        except Exception:
+            logger.exception(f"Account deletion failed for user {user_id}")
+            heartbeat.cancel()
+
+            try:
+                await self._record_failure(job_id, user_id)
+            except Exception:
+                # The lease still lapses, so the job is retried anyway
+                logger.exception(f"Failed to record failure of account deletion job {job_id}")
+
+        finally:
+            heartbeat.cancel()
+
+    async def _record_failure(self, job_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        """
+        Count a failed run and schedule a retry, or give up after `max_attempts`.
+        """
+        now = datetime.now(timezone.utc)
+
+        async with async_session_maker() as session:
+            job = await session.get(AccountDeletionJob, job_id)
+            attempts = (job.attempts or 0) + 1
+
+            if attempts >= self._max_attempts:
+                values = {"status": FAILED, "finished_at": now, "lease_expires_at": None}
+            else:
+                delay = min(self._retry_backoff * 2 ** (attempts - 1), self._max_retry_backoff)
+                values = {"status": PENDING, "lease_expires_at": now + timedelta(seconds=delay)}
+
+            await session.execute(
+                update(AccountDeletionJob).where(AccountDeletionJob.id == job_id).values(attempts=attempts, **values)
+            )
+            await session.commit()
+
+        if values["status"] == FAILED:
+            logger.error(
+                f"Account deletion job {job_id} for user {user_id} failed {attempts} times and was abandoned. "
+                "The user is deactivated with their data partly removed; operator action is required."
+            )
+        else:
+            logger.warning(
+                f"Account deletion job {job_id} failed (attempt {attempts}/{self._max_attempts}); "
+                f"retrying after {values['lease_expires_at'].isoformat()}."
+            )
+
+
+def create_account_deletion_jobs(asset_cleanup: AssetCleanupQueue, counters: CounterBuffer) -> AccountDeletionJobs:
+    """
+    Build the account deletion job runner using environment configuration.
+    """
+    return AccountDeletionJobs(
+        asset_cleanup,
+        counters,
+        lease_seconds=float(os.getenv("DELETION_LEASE_SECONDS", 120)),
+        resume_interval=float(os.getenv("DELETION_RESUME_INTERVAL", 60)),
+        max_attempts=int(os.getenv("DELETION_MAX_ATTEMPTS", 5)),
+        retry_backoff=float(os.getenv("DELETION_RETRY_BACKOFF", 30)),
+    )
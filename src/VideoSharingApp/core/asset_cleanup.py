@@ -0,0 +1,80 @@
+"""
+Background removal of media assets from ImageKit.
+
+Deleting a post or an account only removes database rows in the request
+path; the remote files are queued here and deleted by a small pool of
+workers so requests never wait on storage round-trips.
+"""
+import os
+import asyncio
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+
+class AssetCleanupQueue:
+    """
+    Queue of ImageKit file ids to delete, drained by `concurrency` workers.
+
+    The queue is in-memory: file ids still pending at shutdown are logged
+    so they can be removed manually.
+    """
+    def __init__(self, imagekit, concurrency: int = 2) -> None:
+        self._imagekit = imagekit
+        self._concurrency = concurrency
+        self._queue: asyncio.Queue[str] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+
+    def enqueue(self, file_ids: Iterable[Optional[str]]) -> int:
+        """
+        Schedule remote files for deletion. Missing ids (legacy posts) are skipped.
+
+        Returns:
+        - int: Number of file ids queued.
+        """
+        queued = 0
+        for file_id in file_ids:
+            if file_id:
+                self._queue.put_nowait(file_id)
+                queued += 1
+        return queued
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    async def start(self) -> None:
+        self._workers = [asyncio.create_task(self._work()) for _ in range(self._concurrency)]
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+        if not self._queue.empty():
+            leftover = [self._queue.get_nowait() for _ in range(self._queue.qsize())]
+            logger.warning(f"Asset cleanup stopped with {len(leftover)} pending file ids: {leftover}")
+
+    async def _work(self) -> None:
+        while True:
+            file_id = await self._queue.get()
+
+            try:
+                await asyncio.to_thread(self._imagekit.files.delete, file_id)
+            except Exception:
+                logger.exception(f"Failed to delete remote asset: {file_id}")
+            finally:
+                self._queue.task_done()
+
+
+def create_asset_cleanup_queue(imagekit) -> AssetCleanupQueue:
+    """
+    Build the application's asset cleanup queue using environment configuration.
+    """
+    return AssetCleanupQueue(imagekit, concurrency=int(os.getenv("ASSET_CLEANUP_CONCURRENCY", 2)))
@@ -0,0 +1,204 @@
+"""
+Write-behind buffer for post engagement counters (likes, views).
+
+Increments are accumulated in memory and applied to the denormalized
+`posts.like_count` / `posts.view_count` columns in one batched UPDATE per
+flush, instead of one write (and one SQLite write lock) per event.
+"""
+import os
+import asyncio
+import threading
+import uuid
+from collections import defaultdict
+from typing import Callable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import update, bindparam
+
+from VideoSharingApp.database import engine, Post
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+LIKES = "like_count"
+VIEWS = "view_count"
+COUNTER_FIELDS = (LIKES, VIEWS)
+
+# Longest wait between flush attempts while flushes keep failing
+MAX_FLUSH_BACKOFF_SECONDS = 300
+
+
+class _Shard:
+    """
+    A slice of the pending deltas, guarded by its own lock so increments
+    for unrelated posts never contend.
+    """
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.deltas: defaultdict[tuple[uuid.UUID, str], int] = defaultdict(int)
+
+    def drain(self) -> dict[tuple[uuid.UUID, str], int]:
+        with self.lock:
+            deltas, self.deltas = self.deltas, defaultdict(int)
+        return deltas
+
+
+class CounterBuffer:
+    """
+    Sharded in-memory counter buffer flushed to the database in batches.
+
+    A flush happens every `flush_interval` seconds, or sooner once
+    `flush_threshold` increments are pending. Deltas from a failed flush
+    are merged back and retried with exponential backoff. `stop` performs a final
+    flush so buffered counts survive a clean shutdown.
+    """
+    def __init__(self, shards: int = 16, flush_interval: float = 5.0, flush_threshold: int = 1000) -> None:
+        self._shards = [_Shard() for _ in range(shards)]
+        self._flush_interval = flush_interval
+        self._flush_threshold = flush_threshold
+        self._pending = 0
+        self._flush_requested: Optional[asyncio.Event] = None
+        self._flusher: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Called with the ids of posts whose counters were just written
+        self.flush_listeners: list[Callable[[set[uuid.UUID]], None]] = []
+
+    def _shard_for(self, post_id: uuid.UUID) -> _Shard:
+        return self._shards[hash(post_id) % len(self._shards)]
+
+    def increment(self, post_id: uuid.UUID, field: str, amount: int = 1) -> None:
+        """
+        Buffer a counter change. Never touches the database.
+        """
+        if field not in COUNTER_FIELDS:
+            raise ValueError(f"Unknown counter field: {field}")
+
+        shard = self._shard_for(post_id)
+        with shard.lock:
+            shard.deltas[(post_id, field)] += amount
+
+        self._pending += 1
+        if self._pending >= self._flush_threshold and self._flush_requested is not None:
+            self._flush_requested.set()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def start(self) -> None:
+        self._flush_requested = asyncio.Event()
+        self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """
+        Stop the background flusher and write out everything still buffered.
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+
+        await self.flush()
+
+    async def _flush_loop(self) -> None:
+        failures = 0
+
+        while True:
+            if failures:
+                # Back off while the database is unavailable, ignoring early flush requests
+                await asyncio.sleep(min(self._flush_interval * 2 ** failures, MAX_FLUSH_BACKOFF_SECONDS))
+            else:
+                try:
+                    await asyncio.wait_for(self._flush_requested.wait(), timeout=self._flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception:
+                failures += 1
+                if failures == 1:
+                    logger.exception("Counter flush failed; deltas will be retried with backoff.")
+                else:
+                    logger.warning(f"Counter flush failed again ({failures} in a row); {self._pending} increments pending.")
+            else:
+                if failures:
+                    logger.info(f"Counter flush recovered after {failures} failed attempts.")
+                failures = 0
+
+    async def flush(self) -> int:
+        """
+        Apply all buffered deltas in a single transaction.
+
+        Returns:
+        - int: Number of posts updated.
+        """
+        async with self._flush_lock:
+            self._pending = 0
+
+            merged: dict[uuid.UUID, dict[str, int]] = defaultdict(lambda: dict.fromkeys(COUNTER_FIELDS, 0))
+            for shard in self._shards:
+                for (post_id, field), delta in shard.drain().items():
+                    merged[post_id][field] += delta
+
+            rows = [
+                {"b_id": post_id, "b_likes": deltas[LIKES], "b_views": deltas[VIEWS]}
+                for post_id, deltas in merged.items()
+                if any(deltas.values())
+            ]
+
+            if not rows:
+                return 0
+
+            posts = Post.__table__
+            statement = (
+                update(posts)
+                .where(posts.c.id == bindparam("b_id"))
+                .values(
+                    like_count=posts.c.like_count + bindparam("b_likes"),
+                    view_count=posts.c.view_count + bindparam("b_views"),
+                )
+            )
+
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(statement, rows)
+            except Exception:
+                self._restore(merged)
+                raise
+
+            flushed_ids = {row["b_id"] for row in rows}
+            for listener in self.flush_listeners:
+                listener(flushed_ids)
+
+            return len(rows)
+
+    def _restore(self, merged: dict[uuid.UUID, dict[str, int]]) -> None:
+        """
+        Put the deltas of a failed flush back, without requesting another flush.
+        """
+        for post_id, deltas in merged.items():
+            shard = self._shard_for(post_id)
+            with shard.lock:
+                for field, delta in deltas.items():
+                    if delta:
+                        shard.deltas[(post_id, field)] += delta
+                        self._pending += 1
+
+
+def create_counter_buffer() -> CounterBuffer:
+    """
+    Build the application's counter buffer using environment configuration.
+    """
+    return CounterBuffer(
+        shards=int(os.getenv("COUNTER_SHARDS", 16)),
+        flush_interval=float(os.getenv("COUNTER_FLUSH_INTERVAL", 5)),
+        flush_threshold=int(os.getenv("COUNTER_FLUSH_THRESHOLD", 1000)),
+    )
@@ -20,6 +20,61 @@ def get_imagekit(requests: Request):
     
     return imagekit
 
+def get_event_hub(requests: Request):
+    """
+    Dependency to safely retrieve the feed event hub.
+    """
+    event_hub = getattr(requests.app.state, "event_hub", None)
+
+    if event_hub is None:
+        raise RuntimeError("Event hub was not found in application state.")
+
+    return event_hub
+
+def get_counter_buffer(requests: Request):
+    """
+    Dependency to safely retrieve the engagement counter buffer.
+    """
+    counters = getattr(requests.app.state, "counters", None)
+
+    if counters is None:
+        raise RuntimeError("Counter buffer was not found in application state.")
+
+    return counters
+
+def get_asset_cleanup(requests: Request):
+    """
+    Dependency to safely retrieve the remote asset cleanup queue.
+    """
+    asset_cleanup = getattr(requests.app.state, "asset_cleanup", None)
+
+    if asset_cleanup is None:
+        raise RuntimeError("Asset cleanup queue was not found in application state.")
+
+    return asset_cleanup
+
+def get_account_deletions(requests: Request):
+    """
+    Dependency to safely retrieve the account deletion job runner.
+    """
+    account_deletions = getattr(requests.app.state, "account_deletions", None)
+
+    if account_deletions is None:
+        raise RuntimeError("Account deletion jobs were not found in application state.")
+
+    return account_deletions
+
+def get_idempotency_store(requests: Request):
+    """
+    Dependency to safely retrieve the idempotency key store.
+    """
+    idempotency = getattr(requests.app.state, "idempotency", None)
+
+    if idempotency is None:
+        raise RuntimeError("Idempotency store was not found in application state.")
+
+    return idempotency
+
 def get_database_url() -> str:
     """
     Resolve and validate the database URL.
@@ -62,3 +117,21 @@ def get_database_url() -> str:
         raise RuntimeError("DATABASE_URL cannot be empty. Check environment file.")
     
     return database_url
+
+def get_sqlite_journal_mode() -> str | None:
+    """
+    Resolve the SQLite journal mode applied to every new connection.
+
+    Unset leaves SQLite's own default (rollback journal). Set
+    SQLITE_JOURNAL_MODE=wal to let readers proceed while a write is in
+    progress, which is required when running several worker processes.
+    """
+    journal_mode = os.getenv("SQLITE_JOURNAL_MODE", "").strip().lower()
+
+    if not journal_mode:
+        return None
+
+    if journal_mode not in {"delete", "truncate", "persist", "memory", "wal", "off"}:
+        raise RuntimeError(f"Unsupported SQLITE_JOURNAL_MODE: {journal_mode}. Check environment configurations.")
+
+    return journal_mode
@@ -0,0 +1,353 @@
+"""
+In-process pub/sub hub for pushing feed updates to connected clients.
+
+Events published by the post endpoints are handed to a broadcast backend,
+which delivers them to the hub of every worker process. Each hub then fans
+them out to its own subscribers through bounded queues.
+"""
+import os
+import json
+import uuid
+import asyncio
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+from dotenv import load_dotenv
+
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+POST_CREATED = "post.created"
+POST_DELETED = "post.deleted"
+
+
+@dataclass(frozen=True)
+class FeedEvent:
+    """
+    Compact notification about a change to the feed.
+
+    Clients use the payload to patch their local view, and the id to
+    resume the stream after reconnecting.
+    """
+    type: str
+    data: dict[str, Any]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, raw: str | bytes) -> "FeedEvent":
+        return cls(**json.loads(raw))
+
+
+EventCallback = Callable[[FeedEvent], None]
+
+
+class BroadcastBackend(ABC):
+    """
+    Transport that delivers published events to every worker's hub.
+
+    Subclasses must call the callback registered in `start` once for
+    every event published by any worker (including this one).
+    """
+    @abstractmethod
+    async def start(self, on_event: EventCallback) -> None:
+        ...
+
+    @abstractmethod
+    async def stop(self) -> None:
+        ...
+
+    @abstractmethod
+    async def publish(self, event: FeedEvent) -> None:
+        ...
+
+    @property
+    def cross_process(self) -> bool:
+        """
+        Whether events reach subscribers connected to other worker processes.
+        """
+        return False
+
+
+class InProcessBackend(BroadcastBackend):
+    """
+    Delivers events only within the current process. Default for single-worker runs.
+    """
+    def __init__(self) -> None:
+        self._on_event: Optional[EventCallback] = None
+
+    async def start(self, on_event: EventCallback) -> None:
+        self._on_event = on_event
+
+    async def stop(self) -> None:
+        self._on_event = None
+
+    async def publish(self, event: FeedEvent) -> None:
+        if self._on_event is not None:
+            self._on_event(event)
+
+
+class RedisBroadcastBackend(BroadcastBackend):
+    """
+    Delivers events across worker processes (and hosts) over Redis pub/sub.
+
+    Requires the optional `redis` extra (`pip install ".[redis]"`).
+    """
+    def __init__(self, url: str, channel: str = "videosharingapp:feed-events") -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "EVENTS_BROADCAST_URL points to Redis but the `redis` package is not installed. "
+                "Install the `redis` extra: pip install \".[redis]\""
+            ) from e
+
+        self._client = redis.from_url(url)
+        self._channel = channel
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+
+    @property
+    def cross_process(self) -> bool:
+        return True
+
+    async def start(self, on_event: EventCallback) -> None:
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self._channel)
+        self._listener = asyncio.create_task(self._listen(on_event))
+
+    async def _listen(self, on_event: EventCallback) -> None:
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+
+            try:
+                on_event(FeedEvent.from_json(message["data"]))
+            except Exception:
+                logger.exception("Dropping malformed feed event from broadcast backend.")
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self._channel)
+            await self._pubsub.aclose()
+
+        await self._client.aclose()
+
+    async def publish(self, event: FeedEvent) -> None:
+        await self._client.publish(self._channel, event.to_json())
+
+
+class Subscription:
+    """
+    A single client's view of the event stream.
+
+    Events are buffered in a bounded queue. If the client falls behind and
+    the queue fills up, the hub drops the subscription; the client drains
+    what is already queued and must then reconnect (and resume by event id).
+    """
+    def __init__(self, hub: "EventHub", maxsize: int) -> None:
+        self._hub = hub
+        self.queue: asyncio.Queue[FeedEvent] = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+        self.closing = False  # dropped because the worker is shutting down
+        self._wakeup = asyncio.Event()
+
+    def offer(self, event: FeedEvent) -> bool:
+        """
+        Queue an event without blocking. Returns False if the subscriber is too slow.
+        """
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        True once the subscription was dropped and everything queued has been consumed.
+        """
+        return self.dropped and self.queue.empty()
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[FeedEvent]:
+        """
+        Wait for the next event.
+
+        Returns:
+        - FeedEvent | None: The next event, or None if the timeout elapsed.
+        """
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+
+        getter = asyncio.ensure_future(self.queue.get())
+        waker = asyncio.ensure_future(self._wakeup.wait())
+
+        try:
+            await asyncio.wait({getter, waker}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waker.cancel()
+            if not getter.done():
+                getter.cancel()
+
+        if getter.done() and not getter.cancelled():
+            return getter.result()
+        return None
+
+    def end(self) -> None:
+        """
+        Drop the subscription for shutdown, waking the consumer if it is waiting.
+        """
+        self.closing = True
+        self.dropped = True
+        self._wakeup.set()
+
+    def close(self) -> None:
+        self._hub.unsubscribe(self)
+
+
+class EventHub:
+    """
+    Fans out feed events to the subscribers connected to this worker.
+
+    Keeps a bounded replay buffer so reconnecting clients can resume from
+    the last event id they saw instead of reloading the whole feed.
+    """
+    def __init__(self, backend: BroadcastBackend, queue_size: int = 100, replay_size: int = 1000) -> None:
+        self.backend = backend
+        self._queue_size = queue_size
+        self._replay: deque[FeedEvent] = deque(maxlen=replay_size)
+        self._subscribers: set[Subscription] = set()
+        _hubs.add(self)
+
+    async def start(self) -> None:
+        await self.backend.start(self._dispatch)
+
+    async def stop(self) -> None:
+        await self.backend.stop()
+
+        for subscription in list(self._subscribers):
+            subscription.dropped = True
+        self._subscribers.clear()
+
+    async def publish(self, event_type: str, data: dict[str, Any]) -> FeedEvent:
+        event = FeedEvent(type=event_type, data=data)
+        await self.backend.publish(event)
+        return event
+
+    def _dispatch(self, event: FeedEvent) -> None:
+        self._replay.append(event)
+
+        for subscription in list(self._subscribers):
+            if not subscription.offer(event):
+                logger.warning("Dropping slow feed event subscriber.")
+                subscription.dropped = True
+                self._subscribers.discard(subscription)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> tuple[Subscription, bool]:
+        """
+        Register a new subscriber, optionally replaying missed events.
+
+        Parameters:
+        - last_event_id (str | None): Id of the last event the client received.
+
+        Returns:
+        - tuple[Subscription, bool]: The subscription, and whether the resume
+          was complete. False means the id is no longer in the replay buffer
+          (or too many events were missed) and the client should reload the
+          feed; nothing is replayed then, since the reload covers it.
+        """
+        subscription = Subscription(self, maxsize=self._queue_size)
+        resumed = True
+
+        if last_event_id:
+            replay = list(self._replay)
+            ids = [event.id for event in replay]
+
+            missed = replay[ids.index(last_event_id) + 1:] if last_event_id in ids else None
+
+            # Missed events beyond the queue size are not worth replaying one by one
+            if missed is None or len(missed) > self._queue_size:
+                missed, resumed = [], False
+
+            for event in missed:
+                subscription.offer(event)
+
+        self._subscribers.add(subscription)
+        return subscription, resumed
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        self._subscribers.discard(subscription)
+
+    def close_streams(self) -> None:
+        """
+        End every connected stream. Clients reconnect to another worker and resume by event id.
+        """
+        for subscription in list(self._subscribers):
+            subscription.end()
+        self._subscribers.clear()
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+# Every hub in this process, so server shutdown can end their streams
+_hubs: "weakref.WeakSet[EventHub]" = weakref.WeakSet()
+
+
+def close_all_streams() -> None:
+    """
+    End the feed streams of every hub in this process.
+
+    The server waits for open connections to finish before running lifespan
+    shutdown, and feed streams never finish on their own, so this must be
+    called when the server starts draining.
+    """
+    for hub in list(_hubs):
+        hub.close_streams()
+
+
+def create_broadcast_backend() -> BroadcastBackend:
+    """
+    Select the broadcast backend from `EVENTS_BROADCAST_URL`.
+
+    - Unset: in-process delivery (single worker only)
+    - redis://... or rediss://...: Redis pub/sub
+    """
+    url = os.getenv("EVENTS_BROADCAST_URL", "").strip()
+
+    if not url:
+        return InProcessBackend()
+
+    if url.startswith(("redis://", "rediss://")):
+        return RedisBroadcastBackend(url)
+
+    raise RuntimeError(f"Unsupported EVENTS_BROADCAST_URL scheme: {url.split(':', 1)[0]}")
+
+
+def create_event_hub() -> EventHub:
+    """
+    Build the application's event hub using environment configuration.
+    """
+    return EventHub(
+        backend=create_broadcast_backend(),
+        queue_size=int(os.getenv("EVENTS_QUEUE_SIZE", 100)),
+        replay_size=int(os.getenv("EVENTS_REPLAY_SIZE", 1000)),
+    )
@@ -0,0 +1,301 @@
+"""
+Idempotency-Key support for non-idempotent endpoints.
+
+The first request with a given key claims it (an `in_progress` row) before
+doing any work, and stores its response when done. A retry with the same
+key gets the stored response back without the work being repeated. A
+duplicate arriving while the original is still running waits for it
+instead of racing it; the claim is a primary-key insert, so this holds
+across worker processes too.
+
+Keys are scoped per user and expire after IDEMPOTENCY_TTL seconds.
+"""
+import os
+import json
+import uuid
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, BinaryIO, Callable, Optional
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+
+from VideoSharingApp.database import async_session_maker, IdempotencyKey
+from VideoSharingApp.utils.logger import get_logger
+from VideoSharingApp.utils.timestamps import as_utc
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+FINGERPRINT_CHUNK_BYTES = 1024 * 1024
+
+
+class IdempotencyConflict(ValueError):
+    """
+    Raised when a key cannot be used for this request. Carries the HTTP status to return.
+    """
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def request_fingerprint(method: str, path: str, fields: Optional[dict] = None, file: Optional[BinaryIO] = None) -> str:
+    """
+    Hash of everything that makes a request distinct: method, path, form
+    fields and the uploaded file's contents.
+
+    Blocking when `file` is given; run it in a worker thread.
+    """
+    digest = hashlib.sha256()
+    digest.update(f"{method.upper()} {path}\n".encode("utf-8"))
+    digest.update(json.dumps(fields or {}, sort_keys=True).encode("utf-8"))
+
+    if file is not None:
+        file.seek(0)
+        for chunk in iter(lambda: file.read(FINGERPRINT_CHUNK_BYTES), b""):
+            digest.update(chunk)
+        file.seek(0)
+
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    """
+    Claims, completes and replays idempotency keys.
+
+    - `ttl`: seconds a key (and its stored response) is kept.
+    - `lock_timeout`: seconds after which an unfinished claim is treated as
+      abandoned (e.g. its worker crashed) and may be taken over.
+    - `wait_timeout`: how long a duplicate waits for the original before
+      giving up with 409.
+    """
+    def __init__(
+        self,
+        ttl: float = 86400,
+        lock_timeout: float = 600,
+        wait_timeout: float = 60,
+        poll_interval: float = 0.25,
+        purge_interval: float = 3600,
+    ) -> None:
+        self._ttl = timedelta(seconds=ttl)
+        self._lock_timeout = timedelta(seconds=lock_timeout)
+        self._wait_timeout = wait_timeout
+        self._poll_interval = poll_interval
+        self._purge_interval = purge_interval
+        self._task: Optional[asyncio.Task] = None
+
+        # Set when a claim held by this process finishes, to wake local duplicates early
+        self._finished: dict[tuple[uuid.UUID, str], asyncio.Event] = {}
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._purge_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def run(
+        self,
+        user_id: uuid.UUID,
+        key: str,
+        fingerprint: str,
+        work: Callable[[], Awaitable[dict]],
+    ) -> JSONResponse:
+        """
+        Run `work` at most once per (user, key) and return its JSON response.
+
+        Successful responses and client errors (4xx) are stored and replayed.
+        Server errors release the key so the client can retry.
+
+        Raises:
+        - IdempotencyConflict: 422 if the key was used for a different
+          request, 409 if the original is still running after `wait_timeout`.
+        """
+        stored = await self._claim(user_id, key, fingerprint)
+        if stored is not None:
+            return stored
+
+        try:
+            body = await work()
+        except HTTPException as e:
+            if e.status_code < 500:
+                await self._complete(user_id, key, e.status_code, {"detail": e.detail})
+            else:
+                await self._release(user_id, key)
+            raise
+        except BaseException:
+            await self._release(user_id, key)
+            raise
+
+        await self._complete(user_id, key, 200, body)
+        return JSONResponse(content=body)
+
+    async def _claim(self, user_id: uuid.UUID, key: str, fingerprint: str) -> Optional[JSONResponse]:
+        """
+        Claim the key for this request, or return the stored response of the
+        request that already used it. Waits while that request is running.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self._wait_timeout
+
+        while True:
+            now = datetime.now(timezone.utc)
+
+            async with async_session_maker() as session:
+                existing = await session.get(IdempotencyKey, (user_id, key))
+
+                claimable = existing is None or as_utc(existing.expires_at) <= now
+
+                if not claimable and existing.fingerprint != fingerprint:
+                    raise IdempotencyConflict(422, "Idempotency-Key was already used for a different request.")
+
+                if not claimable and existing.status == COMPLETED:
+                    return JSONResponse(
+                        content=json.loads(existing.response_body),
+                        status_code=existing.response_status,
+                        headers={REPLAYED_HEADER: "true"},
+                    )
+
+                if not claimable and as_utc(existing.locked_at) <= now - self._lock_timeout:
+                    logger.warning(f"Taking over abandoned idempotency key {key!r} for user {user_id}.")
+                    claimable = True
+
+                if claimable:
+                    if existing is not None:
+                        # Only remove the row we looked at; if it changed, someone else got there first
+                        removed = await session.execute(
+                            delete(IdempotencyKey).where(
+                                IdempotencyKey.user_id == user_id,
+                                IdempotencyKey.key == key,
+                                IdempotencyKey.locked_at == existing.locked_at,
+                            )
+                        )
+                        if removed.rowcount == 0:
+                            await session.rollback()
+                            continue
+
+                    session.add(IdempotencyKey(
+                        user_id=user_id,
+                        key=key,
+                        fingerprint=fingerprint,
+                        status=IN_PROGRESS,
+                        locked_at=now,
+                        expires_at=now + self._ttl,
+                    ))
+
+                    try:
+                        await session.commit()
+                    except IntegrityError:
+                        # A concurrent duplicate claimed it first; wait on that one instead
+                        await session.rollback()
+                        continue
+
+                    self._finished[(user_id, key)] = asyncio.Event()
+                    return None
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise IdempotencyConflict(409, "A request with this Idempotency-Key is still in progress.")
+
+            await self._wait(user_id, key, min(self._poll_interval, remaining))
+
+    async def _wait(self, user_id: uuid.UUID, key: str, timeout: float) -> None:
+        finished = self._finished.get((user_id, key))
+
+        if finished is None:
+            # Held by another worker process; poll
+            await asyncio.sleep(timeout)
+            return
+
+        try:
+            await asyncio.wait_for(finished.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _notify(self, user_id: uuid.UUID, key: str) -> None:
+        finished = self._finished.pop((user_id, key), None)
+        if finished is not None:
+            finished.set()
+
+    async def _complete(self, user_id: uuid.UUID, key: str, status_code: int, body: dict) -> None:
+        try:
+            async with async_session_maker() as session:
+                await session.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                    .values(status=COMPLETED, response_status=status_code, response_body=json.dumps(body))
+                )
+                await session.commit()
+        except Exception:
+            # The work is done; a retry after the lock timeout would repeat it, but this request still succeeds
+            logger.exception(f"Failed to store response for idempotency key {key!r}.")
+        finally:
+            self._notify(user_id, key)
+
+    async def _release(self, user_id: uuid.UUID, key: str) -> None:
+        try:
+            async with async_session_maker() as session:
+                await session.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.user_id == user_id,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.status == IN_PROGRESS,
+                    )
+                )
+                await session.commit()
+        except Exception:
+            logger.exception(f"Failed to release idempotency key {key!r}.")
+        finally:
+            self._notify(user_id, key)
+
+    async def purge_expired(self) -> int:
+        """
+        Delete expired keys.
+
+        Returns:
+        - int: Number of keys removed.
+        """
+        async with async_session_maker() as session:
+            result = await session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+            )
+            await session.commit()
+
+        return result.rowcount
+
+    async def _purge_loop(self) -> None:
+        while True:
+            try:
+                purged = await self.purge_expired()
+                if purged:
+                    logger.info(f"Purged {purged} expired idempotency keys.")
+            except Exception:
+                logger.exception("Idempotency key purge failed.")
+
+            await asyncio.sleep(self._purge_interval)
+
+
+def create_idempotency_store() -> IdempotencyStore:
+    """
+    Build the idempotency key store using environment configuration.
+    """
+    return IdempotencyStore(
+        ttl=float(os.getenv("IDEMPOTENCY_TTL", 86400)),
+        lock_timeout=float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", 600)),
+        wait_timeout=float(os.getenv("IDEMPOTENCY_WAIT_TIMEOUT", 60)),
+    )
@@ -4,6 +4,13 @@ from dotenv import load_dotenv
 
 from VideoSharingApp.database import create_db_and_tables
 from VideoSharingApp.images import create_imagekit_client
+from VideoSharingApp.core.events import create_event_hub
+from VideoSharingApp.core.counters import create_counter_buffer
+from VideoSharingApp.core.asset_cleanup import create_asset_cleanup_queue
+from VideoSharingApp.core.account_deletion import create_account_deletion_jobs
+from VideoSharingApp.core.rollups import create_rollup_reconciler
+from VideoSharingApp.core.trending import create_trending_scorer
+from VideoSharingApp.core.idempotency import create_idempotency_store
 from VideoSharingApp.utils.logger import get_logger
 
 load_dotenv()
@@ -19,6 +26,13 @@ async def lifespan(app: FastAPI):
     Initializes:
     - Database tables
     - ImageKit client
+    - Feed event hub
+    - Engagement counter buffer (flushed on shutdown)
+    - Remote asset cleanup queue
+    - Account deletion jobs (resumed after restarts)
+    - Periodic rollup reconciliation
+    - Trending score refresh
+    - Idempotency key store (expired keys purged periodically)
     """
     try:
         logger.info("Starting application startup sequence.")
@@ -29,15 +43,78 @@ async def lifespan(app: FastAPI):
         app.state.imagekit = create_imagekit_client()
         logger.info("ImageKit client initialized successfully.")
 
-        yield
+        app.state.event_hub = create_event_hub()
+        await app.state.event_hub.start()
+        logger.info("Feed event hub started successfully.")
+
+        app.state.counters = create_counter_buffer()
+        await app.state.counters.start()
+        logger.info("Counter buffer started successfully.")
+
+        app.state.asset_cleanup = create_asset_cleanup_queue(app.state.imagekit)
+        await app.state.asset_cleanup.start()
+        logger.info("Asset cleanup queue started successfully.")
+
+        app.state.account_deletions = create_account_deletion_jobs(app.state.asset_cleanup, app.state.counters)
+        await app.state.account_deletions.start()
+        logger.info("Account deletion jobs started successfully (interrupted jobs are resumed).")
+
+        app.state.rollup_reconciler = create_rollup_reconciler()
+        await app.state.rollup_reconciler.start()
+        logger.info("Rollup reconciler started successfully.")
 
-    except Exception as e:
+        app.state.trending_scorer = create_trending_scorer()
+        app.state.counters.flush_listeners.append(app.state.trending_scorer.mark_dirty)
+        await app.state.trending_scorer.start()
+        logger.info("Trending scorer started successfully.")
+
+        app.state.idempotency = create_idempotency_store()
+        await app.state.idempotency.start()
+        logger.info("Idempotency store started successfully.")
+
+    except Exception:
         logger.critical(
             "Application startup failed. Shutting down.",
             exc_info=True,
         )
+        await shutdown(app)
         raise
 
+    try:
+        yield
     finally:
-        logger.info("Application shutdown sequence complete.")
-        
\ No newline at end of file
+        await shutdown(app)
+
+
+# (app.state attribute, action, log message), in shutdown order. Counters are
+# flushed first so buffered likes/views survive a failure in any later step.
+SHUTDOWN_STEPS = (
+    ("counters", "stop", "Counter buffer flushed and stopped."),
+    ("trending_scorer", "stop", "Trending scorer stopped."),
+    ("account_deletions", "stop", "Account deletion jobs stopped."),
+    ("idempotency", "stop", "Idempotency store stopped."),
+    ("rollup_reconciler", "stop", "Rollup reconciler stopped."),
+    ("asset_cleanup", "stop", "Asset cleanup queue stopped."),
+    ("event_hub", "stop", "Feed event hub stopped."),
+    # Likes/views buffered by requests that finished during the steps above
+    ("counters", "flush", "Counter buffer flushed."),
+)
+
+
+async def shutdown(app: FastAPI) -> None:
+    """
+    Stop every component that was started. Each step is guarded, so one
+    failing component does not prevent the others from shutting down.
+    """
+    for name, action, message in SHUTDOWN_STEPS:
+        component = getattr(app.state, name, None)
+        if component is None:
+            continue
+
+        try:
+            await getattr(component, action)()
+            logger.info(message)
+        except Exception:
+            logger.exception(f"Failed to {action} {name} during shutdown.")
+
+    logger.info("Application shutdown sequence complete.")
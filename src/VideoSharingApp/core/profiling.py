@@ -0,0 +1,248 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when a superuser sends `X-Profile: 1`, or when it is
+picked by random sampling (PROFILE_SAMPLE_RATE). Profiled requests get a
+cProfile trace plus timing spans for database and storage work, written
+to PROFILE_DIR with bounded retention. Superuser-requested profiles also
+return the breakdown in a `Server-Timing` header.
+
+The timing spans are per request. The cProfile trace is not: it hooks the
+event loop thread, so it also records every other coroutine that ran
+while the request was in flight. Each profile's JSON summary records the
+peak number of concurrent requests (`concurrent_requests`); traces where it
+is above 1 include other requests' work.
+
+Profiling stops when a streaming response (e.g. Server-Sent Events)
+starts, or after PROFILE_MAX_SECONDS, whichever comes first.
+"""
+import os
+import json
+import asyncio
+import random
+import threading
+import time
+import cProfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+PROFILE_HEADER = b"x-profile"
+
+# Span name -> [total seconds, count], set only while a profiled request runs
+_spans: ContextVar[Optional[dict[str, list[float]]]] = ContextVar("profiling_spans", default=None)
+
+# cProfile hooks the whole interpreter thread, so only one request is profiled at a time
+_profiler_lock = threading.Lock()
+
+
+def _record(name: str, elapsed: float) -> None:
+    spans = _spans.get()
+    if spans is not None:
+        span = spans.setdefault(name, [0.0, 0])
+        span[0] += elapsed
+        span[1] += 1
+
+
+@contextmanager
+def timed_span(name: str):
+    """
+    Attribute the enclosed block's wall time to `name` on the current profile.
+    A no-op when the request is not being profiled.
+    """
+    if _spans.get() is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(name, time.perf_counter() - start)
+
+
+def install_db_timing(engine) -> None:
+    """
+    Record time spent executing SQL statements as the `db` span.
+    """
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if _spans.get() is not None:
+            conn.info.setdefault("profiling_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("profiling_query_start")
+        if starts:
+            _record("db", time.perf_counter() - starts.pop())
+
+
+def server_timing(spans: dict[str, list[float]], total: float) -> str:
+    """
+    Format spans as a Server-Timing header value (durations in milliseconds).
+    """
+    metrics = [f'{name};dur={seconds * 1000:.1f};desc="{int(count)} calls"' for name, (seconds, count) in sorted(spans.items())]
+    metrics.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(metrics)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware that profiles selected requests.
+    """
+    def __init__(
+        self,
+        app: ASGIApp,
+        sample_rate: float = 0.0,
+        output_dir: str = "./artifacts/profiles",
+        retention: int = 50,
+        max_seconds: float = 30.0,
+    ) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.output_dir = Path(output_dir)
+        self.retention = retention
+        self.max_seconds = max_seconds
+        self._in_flight = 0
+        # [peak concurrent requests] while a trace is running, else None
+        self._trace_peak: Optional[list[int]] = None
+
+    async def _requested_by_superuser(self, scope: Scope) -> bool:
+        headers = dict(scope.get("headers", []))
+
+        if headers.get(PROFILE_HEADER, b"").strip() not in {b"1", b"true"}:
+            return False
+
+        from VideoSharingApp.users import bearer_token, get_user_from_token
+
+        user = await get_user_from_token(bearer_token(headers.get(b"authorization", b"").decode("latin-1")))
+
+        return user is not None and user.is_superuser
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        self._in_flight += 1
+        if self._trace_peak is not None:
+            self._trace_peak[0] = max(self._trace_peak[0], self._in_flight)
+
+        try:
+            await self._handle(scope, receive, send)
+        finally:
+            self._in_flight -= 1
+
+    async def _handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        requested = await self._requested_by_superuser(scope)
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+
+        if not (requested or sampled) or not _profiler_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        spans: dict[str, list[float]] = {}
+        token = _spans.set(spans)
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        stopped_by: Optional[str] = None
+        peak = self._trace_peak = [self._in_flight]
+
+        def finish(reason: str) -> None:
+            # Idempotent; may run from the timeout callback (same thread) or when the request ends
+            nonlocal stopped_by
+            if stopped_by is None:
+                stopped_by = reason
+                profiler.disable()
+                self._trace_peak = None
+                _profiler_lock.release()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                if requested:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(spans, time.perf_counter() - start).encode("latin-1")))
+                    message = {**message, "headers": headers}
+
+                content_type = dict(message.get("headers", [])).get(b"content-type", b"")
+                if content_type.startswith(b"text/event-stream"):
+                    finish("streaming response")
+
+            await send(message)
+
+        timeout = asyncio.get_running_loop().call_later(self.max_seconds, finish, "max duration")
+
+        try:
+            profiler.enable()
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            timeout.cancel()
+            finish("completed")
+            total = time.perf_counter() - start
+            _spans.reset(token)
+
+            try:
+                await asyncio.to_thread(
+                    self._save, scope, profiler, spans, total, "header" if requested else "sampled", stopped_by, peak[0],
+                )
+            except Exception:
+                logger.exception("Failed to write request profile.")
+
+    def _save(
+        self,
+        scope: Scope,
+        profiler: cProfile.Profile,
+        spans: dict,
+        total: float,
+        trigger: str,
+        stopped_by: str,
+        concurrent_requests: int,
+    ) -> None:
+        """
+        Write the cProfile trace (.prof) and span summary (.json), then enforce retention.
+        Blocking; runs in a worker thread.
+        """
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+
+        path = scope.get("path", "").strip("/").replace("/", "_") or "root"
+        stem = f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{scope.get('method', 'GET')}-{path[:80]}"
+
+        profiler.dump_stats(self.output_dir / f"{stem}.prof")
+        (self.output_dir / f"{stem}.json").write_text(json.dumps({
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "trigger": trigger,
+            "total_ms": round(total * 1000, 3),
+            "trace_stopped_by": stopped_by,
+            "concurrent_requests": concurrent_requests,
+            "spans": {name: {"ms": round(seconds * 1000, 3), "count": int(count)} for name, (seconds, count) in spans.items()},
+        }, indent=2))
+
+        profiles = sorted(self.output_dir.glob("*.prof"), key=lambda p: p.stat().st_mtime, reverse=True)
+        for stale in profiles[self.retention:]:
+            stale.unlink(missing_ok=True)
+            stale.with_suffix(".json").unlink(missing_ok=True)
+
+
+def profiling_options() -> dict:
+    """
+    ProfilingMiddleware options from environment configuration.
+    """
+    return {
+        "sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", 0)),
+        "output_dir": os.getenv("PROFILE_DIR", "./artifacts/profiles"),
+        "retention": int(os.getenv("PROFILE_RETENTION", 50)),
+        "max_seconds": float(os.getenv("PROFILE_MAX_SECONDS", 30)),
+    }
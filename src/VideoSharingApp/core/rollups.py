@@ -0,0 +1,222 @@
+"""
+Hourly and daily upload rollups.
+
+Every post insert/delete applies a +1/-1 delta (and its byte size) to the
+matching `post_rollups` rows in the same transaction. A periodic
+reconciliation recomputes the most recent days from `posts` to correct any
+drift, touching only that window.
+"""
+import os
+import uuid
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select, delete, func, literal, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from VideoSharingApp.database import async_session_maker, Post, PostRollup
+from VideoSharingApp.utils.logger import get_logger
+from VideoSharingApp.utils.timestamps import as_utc
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+HOUR = "hour"
+DAY = "day"
+GRANULARITIES = (HOUR, DAY)
+
+RollupKey = tuple[str, datetime, uuid.UUID, str]
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> datetime:
+    """
+    Start of the UTC hour or day containing `timestamp`.
+    """
+    timestamp = as_utc(timestamp).astimezone(timezone.utc)
+
+    if granularity == HOUR:
+        return timestamp.replace(minute=0, second=0, microsecond=0)
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _aggregate(rows: Iterable[tuple], sign: int = 1) -> dict[RollupKey, list[int]]:
+    """
+    Sum (user_id, file_type, created_at, size_bytes) rows into per-bucket [count, bytes] deltas.
+    """
+    deltas: dict[RollupKey, list[int]] = defaultdict(lambda: [0, 0])
+
+    for user_id, file_type, created_at, size_bytes in rows:
+        for granularity in GRANULARITIES:
+            delta = deltas[(granularity, bucket_start(created_at, granularity), user_id, file_type)]
+            delta[0] += sign
+            delta[1] += sign * (size_bytes or 0)
+
+    return deltas
+
+
+def _dialect_insert(session: AsyncSession):
+    """
+    INSERT construct supporting ON CONFLICT for the session's database.
+    """
+    if session.bind.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
+async def record_posts(session: AsyncSession, posts: Iterable, sign: int = 1) -> None:
+    """
+    Apply rollup deltas for posts being created (sign=1) or deleted (sign=-1).
+
+    Runs in the caller's transaction, so rollups commit atomically with the
+    post changes. `posts` may be ORM objects or rows with user_id, file_type,
+    created_at and size_bytes attributes.
+    """
+    deltas = _aggregate(
+        ((post.user_id, post.file_type, post.created_at, post.size_bytes) for post in posts),
+        sign=sign,
+    )
+
+    if not deltas:
+        return
+
+    insert = _dialect_insert(session)
+    rollups = PostRollup.__table__
+    statement = insert(rollups)
+    statement = statement.on_conflict_do_update(
+        index_elements=[rollups.c.granularity, rollups.c.bucket_start, rollups.c.user_id, rollups.c.file_type],
+        set_={
+            "post_count": rollups.c.post_count + statement.excluded.post_count,
+            "bytes_total": rollups.c.bytes_total + statement.excluded.bytes_total,
+        },
+    )
+
+    await session.execute(statement, [
+        {
+            "granularity": granularity,
+            "bucket_start": start,
+            "user_id": user_id,
+            "file_type": file_type,
+            "post_count": count,
+            "bytes_total": size,
+        }
+        for (granularity, start, user_id, file_type), (count, size) in deltas.items()
+    ])
+
+
+def _bucket_expression(dialect_name: str, granularity: str):
+    """
+    SQL expression for `bucket_start` of a post, matching what `record_posts` stores.
+    """
+    if dialect_name == "postgresql":
+        return func.date_trunc(granularity, Post.created_at, "UTC")
+
+    # SQLite: same text layout SQLAlchemy uses for bound datetimes, so both paths hit the same key
+    layout = "%Y-%m-%d %H:00:00.000000" if granularity == HOUR else "%Y-%m-%d 00:00:00.000000"
+    return func.strftime(layout, Post.created_at)
+
+
+async def reconcile_rollups(days: int) -> int:
+    """
+    Recompute rollups for the last `days` days (including today) from `posts`.
+
+    Runs as one write transaction that starts with the write: the window's
+    rollups are deleted and rebuilt with INSERT ... SELECT ... GROUP BY,
+    so the rebuild sees a single consistent view of `posts` and no rows
+    pass through Python.
+
+    Returns:
+    - int: Number of rollup rows written.
+    """
+    since = bucket_start(datetime.now(timezone.utc), DAY) - timedelta(days=days - 1)
+    written = 0
+
+    async with async_session_maker() as session:
+        dialect_name = session.bind.dialect.name
+        insert = _dialect_insert(session)
+        rollups = PostRollup.__table__
+
+        await session.execute(delete(PostRollup).where(PostRollup.bucket_start >= since))
+
+        for granularity in GRANULARITIES:
+            bucket = _bucket_expression(dialect_name, granularity)
+
+            aggregated = (
+                select(
+                    literal(granularity, String),
+                    bucket,
+                    Post.user_id,
+                    Post.file_type,
+                    func.count(),
+                    func.coalesce(func.sum(Post.size_bytes), 0),
+                )
+                # Small margin on the indexed column: stored timestamps may lack fractional seconds
+                .where(Post.created_at >= since - timedelta(seconds=1), _bucket_expression(dialect_name, DAY) >= since)
+                .group_by(bucket, Post.user_id, Post.file_type)
+            )
+
+            statement = insert(rollups).from_select(
+                ["granularity", "bucket_start", "user_id", "file_type", "post_count", "bytes_total"],
+                aggregated,
+            )
+            # A concurrent upload may have re-created a row since the delete; the recount wins
+            statement = statement.on_conflict_do_update(
+                index_elements=[rollups.c.granularity, rollups.c.bucket_start, rollups.c.user_id, rollups.c.file_type],
+                set_={
+                    "post_count": statement.excluded.post_count,
+                    "bytes_total": statement.excluded.bytes_total,
+                },
+            )
+
+            result = await session.execute(statement)
+            written += max(result.rowcount, 0)
+
+        await session.commit()
+
+    return written
+
+
+class RollupReconciler:
+    """
+    Background task that periodically reconciles recent rollups.
+    """
+    def __init__(self, interval: float = 3600, days: int = 2) -> None:
+        self._interval = interval
+        self._days = days
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                written = await reconcile_rollups(self._days)
+                logger.info(f"Reconciled post rollups for the last {self._days} days ({written} rows).")
+            except Exception:
+                logger.exception("Rollup reconciliation failed.")
+
+            await asyncio.sleep(self._interval)
+
+
+def create_rollup_reconciler() -> RollupReconciler:
+    """
+    Build the rollup reconciler using environment configuration.
+    """
+    return RollupReconciler(
+        interval=float(os.getenv("ROLLUP_RECONCILE_INTERVAL", 3600)),
+        days=int(os.getenv("ROLLUP_RECONCILE_DAYS", 2)),
+    )
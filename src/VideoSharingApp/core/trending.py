@@ -0,0 +1,144 @@
+"""
+Incrementally maintained trending scores.
+
+Scores use a logarithmic time-decay ("hot") formula:
+
+    score = log10(max(points, 1)) + (created_at - EPOCH) / DECAY_SECONDS
+
+A post needs 10x the points to keep pace with one that is DECAY_SECONDS
+newer. The time term is fixed per post, so relative order never changes
+just because time passes: a post is rescored only when its likes/views
+change, and refresh cost scales with activity rather than total posts.
+"""
+import os
+import math
+import uuid
+import asyncio
+from datetime import datetime, timezone
+from typing import Optional
+
+from dotenv import load_dotenv
+from sqlalchemy import select, update, bindparam
+
+from VideoSharingApp.database import engine, async_session_maker, Post
+from VideoSharingApp.utils.logger import get_logger
+from VideoSharingApp.utils.timestamps import as_utc
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+TRENDING_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+TRENDING_DECAY_SECONDS = float(os.getenv("TRENDING_DECAY_SECONDS", 45000))
+TRENDING_LIKE_WEIGHT = float(os.getenv("TRENDING_LIKE_WEIGHT", 10))
+TRENDING_VIEW_WEIGHT = float(os.getenv("TRENDING_VIEW_WEIGHT", 1))
+
+# Posts rescored per UPDATE batch
+TRENDING_BATCH_SIZE = 500
+
+
+def trending_score(like_count: int, view_count: int, created_at: datetime) -> float:
+    """
+    Time-decayed popularity score of a post. Higher is more trending.
+    """
+    created_at = as_utc(created_at)
+
+    points = (like_count or 0) * TRENDING_LIKE_WEIGHT + (view_count or 0) * TRENDING_VIEW_WEIGHT
+    age_term = (created_at - TRENDING_EPOCH).total_seconds() / TRENDING_DECAY_SECONDS
+
+    return round(math.log10(max(points, 1)) + age_term, 7)
+
+
+class TrendingScorer:
+    """
+    Rescores posts whose engagement counters changed.
+
+    Subscribed to the counter buffer's flushes; every `interval` seconds it
+    recomputes the scores of the posts flushed since the last run, plus a
+    bounded batch of posts that have never been scored (e.g. created before
+    scoring existed).
+    """
+    def __init__(self, interval: float = 30) -> None:
+        self._interval = interval
+        self._dirty: set[uuid.UUID] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def mark_dirty(self, post_ids: set[uuid.UUID]) -> None:
+        self._dirty.update(post_ids)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+        # Pick up the counters flushed during shutdown
+        await self.refresh()
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Trending score refresh failed.")
+
+    async def refresh(self) -> int:
+        """
+        Recompute scores for dirty and never-scored posts.
+
+        Returns:
+        - int: Number of posts rescored.
+        """
+        dirty, self._dirty = list(self._dirty), set()
+        rescored = 0
+
+        try:
+            async with async_session_maker() as session:
+                unscored = (await session.execute(
+                    select(Post.id).where(Post.trending_score.is_(None)).limit(TRENDING_BATCH_SIZE)
+                )).scalars().all()
+
+            post_ids = list(set(dirty) | set(unscored))
+
+            for start in range(0, len(post_ids), TRENDING_BATCH_SIZE):
+                rescored += await self._rescore(post_ids[start:start + TRENDING_BATCH_SIZE])
+
+        except Exception:
+            self._dirty.update(dirty)
+            raise
+
+        return rescored
+
+    async def _rescore(self, post_ids: list[uuid.UUID]) -> int:
+        async with async_session_maker() as session:
+            rows = (await session.execute(
+                select(Post.id, Post.like_count, Post.view_count, Post.created_at).where(Post.id.in_(post_ids))
+            )).all()
+
+        if not rows:
+            return 0
+
+        posts = Post.__table__
+        statement = update(posts).where(posts.c.id == bindparam("b_id")).values(trending_score=bindparam("b_score"))
+
+        async with engine.begin() as conn:
+            await conn.execute(statement, [
+                {"b_id": row.id, "b_score": trending_score(row.like_count, row.view_count, row.created_at)}
+                for row in rows
+            ])
+
+        return len(rows)
+
+
+def create_trending_scorer() -> TrendingScorer:
+    """
+    Build the trending scorer using environment configuration.
+    """
+    return TrendingScorer(interval=float(os.getenv("TRENDING_REFRESH_INTERVAL", 30)))
@@ -0,0 +1,294 @@
+"""
+Early rejection of invalid uploads.
+
+- `UploadSizeLimitMiddleware` rejects upload requests whose Content-Length
+  is over the limit before reading the body. While the body streams in,
+  it follows the multipart structure, sniffs the first bytes of each file
+  part against an allow-list and aborts as soon as a part has the wrong
+  type or grows past the limit for its type, so a bad upload costs only
+  the bytes received up to that point. Batch uploads only get the request
+  size cap, since they report each file's result separately.
+- `validate_upload` repeats the type and size checks on each parsed file
+  before anything is copied to disk or sent to storage.
+"""
+import os
+import json
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import UploadFile
+from python_multipart.multipart import MultipartParser, parse_options_header
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from VideoSharingApp.utils.media_probe import sniff_mime, SNIFF_BYTES
+from VideoSharingApp.utils.logger import get_logger
+
+load_dotenv()
+
+logger = get_logger(__name__)
+
+MiB = 1024 * 1024
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", 20 * MiB))
+MAX_VIDEO_UPLOAD_BYTES = int(os.getenv("MAX_VIDEO_UPLOAD_BYTES", 500 * MiB))
+
+# Accepted formats (sniffed from file contents) and their size limits
+UPLOAD_SIZE_LIMITS = {
+    "image/jpeg": MAX_IMAGE_UPLOAD_BYTES,
+    "image/png": MAX_IMAGE_UPLOAD_BYTES,
+    "video/mp4": MAX_VIDEO_UPLOAD_BYTES,
+    "video/quicktime": MAX_VIDEO_UPLOAD_BYTES,
+    "video/webm": MAX_VIDEO_UPLOAD_BYTES,
+    "video/x-matroska": MAX_VIDEO_UPLOAD_BYTES,
+}
+
+# Room for multipart boundaries and form fields on top of the file itself
+MULTIPART_OVERHEAD_BYTES = 1 * MiB
+
+MAX_UPLOAD_REQUEST_BYTES = max(UPLOAD_SIZE_LIMITS.values()) + MULTIPART_OVERHEAD_BYTES
+MAX_BATCH_UPLOAD_REQUEST_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", 2048 * MiB))
+
+
+class UploadRejected(ValueError):
+    """
+    Raised when an upload fails validation. Carries the HTTP status to return.
+    """
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+def unsupported_type() -> UploadRejected:
+    return UploadRejected(415, "Unsupported media type. Allowed: JPEG, PNG, MP4, MOV, WebM, MKV.")
+
+
+def too_large(mime_type: str) -> UploadRejected:
+    return UploadRejected(413, f"File too large. Limit for {mime_type} is {UPLOAD_SIZE_LIMITS[mime_type] // MiB} MiB.")
+
+
+def validate_upload(file: UploadFile) -> str:
+    """
+    Check an uploaded file's real type and size before it is processed.
+
+    Returns:
+    - str: The sniffed MIME type.
+
+    Raises:
+    - UploadRejected: 415 if the content is not an allowed media format,
+      413 if it is over the limit for its type.
+    """
+    header = file.file.read(SNIFF_BYTES)
+    file.file.seek(0)
+
+    mime_type = sniff_mime(header)
+    if mime_type not in UPLOAD_SIZE_LIMITS:
+        raise unsupported_type()
+
+    size = file.size
+    if size is None:
+        size = file.file.seek(0, os.SEEK_END)
+        file.file.seek(0)
+
+    if size > UPLOAD_SIZE_LIMITS[mime_type]:
+        raise too_large(mime_type)
+
+    return mime_type
+
+
+def upload_request_limit(path: str) -> Optional[int]:
+    """
+    Maximum request body size for an upload endpoint, or None for other paths.
+    """
+    if path.endswith("/posts/upload/batch"):
+        return MAX_BATCH_UPLOAD_REQUEST_BYTES
+    if path.endswith("/posts/upload"):
+        return MAX_UPLOAD_REQUEST_BYTES
+    return None
+
+
+def inspects_file_parts(path: str) -> bool:
+    """
+    Whether a bad file part rejects the whole request at `path`. Only single
+    uploads; batch uploads report a result for each file instead.
+    """
+    return path.endswith("/posts/upload")
+
+
+class FilePartInspector:
+    """
+    Follows a multipart/form-data body chunk by chunk and checks each file
+    part's sniffed type and running size, without buffering the body.
+
+    `feed` returns the first rejection found. Bodies the inspector cannot
+    parse are left to the form parser to reject.
+    """
+    def __init__(self, boundary: bytes) -> None:
+        self.rejection: Optional[UploadRejected] = None
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+        self._headers: dict[bytes, bytes] = {}
+        self._is_file = False
+        self._head = bytearray()
+        self._mime_type: Optional[str] = None
+        self._size = 0
+        self._parser: Optional[MultipartParser] = MultipartParser(boundary, callbacks={
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+        })
+
+    @classmethod
+    def for_content_type(cls, content_type: bytes) -> Optional["FilePartInspector"]:
+        media_type, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+
+        if media_type != b"multipart/form-data" or not boundary:
+            return None
+
+        return cls(boundary)
+
+    def feed(self, chunk: bytes) -> Optional[UploadRejected]:
+        if self._parser is not None and self.rejection is None and chunk:
+            try:
+                self._parser.write(chunk)
+            except Exception:
+                self._parser = None
+
+        return self.rejection
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._is_file = False
+        self._head = bytearray()
+        self._mime_type = None
+        self._size = 0
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[bytes(self._header_field).lower()] = bytes(self._header_value)
+        self._header_field = bytearray()
+        self._header_value = bytearray()
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        self._is_file = bool(options.get(b"filename"))
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if not self._is_file or self.rejection is not None:
+            return
+
+        self._size += end - start
+
+        if self._mime_type is None:
+            self._head += data[start:min(end, start + SNIFF_BYTES - len(self._head))]
+            if len(self._head) >= SNIFF_BYTES:
+                self._classify()
+
+        if self._mime_type is not None and self._size > UPLOAD_SIZE_LIMITS[self._mime_type]:
+            self.rejection = too_large(self._mime_type)
+
+    def _on_part_end(self) -> None:
+        # Files shorter than the sniff window
+        if self._is_file and self._mime_type is None and self.rejection is None and self._size:
+            self._classify()
+
+    def _classify(self) -> None:
+        mime_type = sniff_mime(bytes(self._head))
+
+        if mime_type not in UPLOAD_SIZE_LIMITS:
+            self.rejection = unsupported_type()
+        else:
+            self._mime_type = mime_type
+
+
+class UploadSizeLimitMiddleware:
+    """
+    ASGI middleware enforcing upload limits while the body is still
+    streaming in, before multipart parsing spools it: the request size
+    limit and, for single uploads, the type allow-list and per-type size
+    limit of the file.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        limit = upload_request_limit(scope.get("path", "")) if scope["type"] == "http" else None
+
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers", []))
+
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            await self._reject(send, request_too_large(limit))
+            return
+
+        inspector = None
+        if inspects_file_parts(scope.get("path", "")):
+            inspector = FilePartInspector.for_content_type(headers.get(b"content-type", b""))
+        received = 0
+        rejection: Optional[UploadRejected] = None
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejection
+            message = await receive()
+
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                received += len(body)
+
+                if received > limit:
+                    rejection = request_too_large(limit)
+                elif inspector is not None:
+                    rejection = inspector.feed(body)
+
+                if rejection is not None:
+                    # Stop reading; the app sees a disconnect and gives up on the body
+                    return {"type": "http.disconnect"}
+
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            # Once rejected, the app's (error) response is replaced by the rejection
+            if rejection is not None:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if rejection is None:
+                raise
+
+        if rejection is not None and not response_started:
+            logger.warning(f"Aborted upload after {received} bytes ({rejection.status_code}): {scope.get('path')}")
+            await self._reject(send, rejection)
+
+    @staticmethod
+    async def _reject(send: Send, rejection: UploadRejected) -> None:
+        body = json.dumps({"detail": rejection.detail}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode()), (b"connection", b"close")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+def request_too_large(limit: int) -> UploadRejected:
+    return UploadRejected(413, f"Upload too large. Limit is {limit // MiB} MiB.")
@@ -1,7 +1,7 @@
 import uuid
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, Iterable
 
-from sqlalchemy import Column, String, Text, DateTime, ForeignKey
+from sqlalchemy import select, Column, String, Text, Integer, BigInteger, Float, DateTime, ForeignKey, Index, event, inspect, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import DeclarativeBase, relationship
 from sqlalchemy.dialects.postgresql import UUID
@@ -10,7 +10,7 @@ from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sess
 from fastapi_users.db import SQLAlchemyUserDatabase, SQLAlchemyBaseUserTableUUID
 from fastapi import Depends
 
-from VideoSharingApp.core.dependencies import get_database_url
+from VideoSharingApp.core.dependencies import get_database_url, get_sqlite_journal_mode
 from VideoSharingApp.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -44,8 +44,11 @@ class User(SQLAlchemyBaseUserTableUUID, Base):
     posts = relationship(
         "Post",
         back_populates="user",
-        cascade="all, delete-orphan", # Delete all orphaned posts, when a user is deleted
-        lazy="selectin",
+        cascade="all, delete-orphan",
+        # Never load a user's posts implicitly (not on every authenticated request,
+        # and not on delete). Posts are removed in batches by core.account_deletion.
+        lazy="noload",
+        passive_deletes=True,
     )
 
     def __repr__(self) -> str:
@@ -70,27 +73,182 @@ class Post(Base):
     image_url = Column(String, nullable=False)
     file_type = Column(String, nullable=False)  # image | video
     file_name = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    file_id = Column(String, nullable=True)  # ImageKit file id, used to delete the remote asset
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    # Media metadata extracted at upload time (None when it could not be determined)
+    mime_type = Column(String, nullable=True)
+    size_bytes = Column(BigInteger, nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    duration_seconds = Column(Float, nullable=True)  # videos only
+
+    # Denormalized engagement counters, maintained in batches by core.counters.CounterBuffer
+    like_count = Column(Integer, nullable=False, default=0, server_default="0")
+    view_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    # Time-decayed popularity, refreshed by core.trending when likes/views change
+    trending_score = Column(Float, nullable=True, index=True)
 
     user = relationship("User", back_populates="posts")
 
     def __repr__(self) -> str:
         return f"<Post id={self.id} user_id={self.user_id}>"
 
+class PostLike(Base):
+    """
+    A user's like on a post. At most one per (post, user).
+    """
+    __tablename__ = "post_likes"
+
+    post_id = Column(UUID(as_uuid=True), ForeignKey("posts.id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<PostLike post_id={self.post_id} user_id={self.user_id}>"
+
+class PostRollup(Base):
+    """
+    Pre-aggregated upload activity per time bucket, user and file type.
+
+    Maintained incrementally on upload/delete by core.rollups and
+    periodically reconciled against `posts`, so dashboards never scan posts.
+    """
+    __tablename__ = "post_rollups"
+
+    granularity = Column(String, primary_key=True)  # hour | day
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    file_type = Column(String, primary_key=True)
+    post_count = Column(Integer, nullable=False, default=0, server_default="0")
+    bytes_total = Column(BigInteger, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        Index("ix_post_rollups_granularity_bucket", "granularity", "bucket_start"),
+    )
+
+    def __repr__(self) -> str:
+        return f"<PostRollup {self.granularity} {self.bucket_start} user_id={self.user_id} {self.file_type}>"
+
+class AccountDeletionJob(Base):
+    """
+    A background account deletion and its progress.
+
+    Persisted so progress can be read from any worker, and so a deletion
+    interrupted by a restart is resumed by whichever worker next claims
+    its lease. Managed by core.account_deletion.
+    """
+    __tablename__ = "account_deletion_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # no FK: the user row is deleted last
+    status = Column(String, nullable=False, default="pending")  # pending | running | completed | failed
+    total_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    deleted_posts = Column(Integer, nullable=False, default=0, server_default="0")
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    lease_expires_at = Column(DateTime(timezone=True), nullable=True, index=True)  # None or past: claimable
+    attempts = Column(Integer, nullable=False, default=0, server_default="0")  # failed runs so far
+
+    def __repr__(self) -> str:
+        return f"<AccountDeletionJob id={self.id} user_id={self.user_id} status={self.status}>"
+
+class IdempotencyKey(Base):
+    """
+    A client-supplied Idempotency-Key and the outcome of the request that used it.
+
+    Claimed as `in_progress` before the request does any work, then
+    `completed` with the response to replay. Managed by core.idempotency.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)  # sha256 of the request it was first used with
+    status = Column(String, nullable=False)  # in_progress | completed
+    response_status = Column(Integer, nullable=True)
+    response_body = Column(Text, nullable=True)  # JSON
+    locked_at = Column(DateTime(timezone=True), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<IdempotencyKey user_id={self.user_id} key={self.key} status={self.status}>"
+
 engine = create_async_engine(
     DATABASE_URL,
     echo=False,     # set True for SQL debugging
     future=True,    # SQLAlchemy 2.0 style
 )
 
+if engine.dialect.name == "sqlite":
+    SQLITE_JOURNAL_MODE = get_sqlite_journal_mode()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def configure_sqlite_connection(dbapi_connection, connection_record) -> None:
+        """
+        Apply per-connection SQLite settings.
+        - Journal mode (WAL allows concurrent readers alongside a writer)
+        - Busy timeout so concurrent writers wait instead of failing immediately
+        """
+        cursor = dbapi_connection.cursor()
+        if SQLITE_JOURNAL_MODE:
+            cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
 async_session_maker = async_sessionmaker(
     engine,
     expire_on_commit=False,  # prevents detached objects
 )
 
+def add_missing_columns(connection) -> None:
+    """
+    Bring existing tables up to date with the ORM models.
+
+    `create_all` only creates missing tables. Columns and indexes added to a
+    model later are added here, provided the column is nullable or has a
+    server default.
+    """
+    inspector = inspect(connection)
+
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+
+        existing_columns = {column["name"] for column in inspector.get_columns(table.name)}
+
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+
+            if not column.nullable and column.server_default is None:
+                logger.warning("Cannot add column %s.%s without a server default.", table.name, column.name)
+                continue
+
+            ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(dialect=connection.dialect)}"
+
+            if column.server_default is not None:
+                default = column.server_default.arg
+                default = f"'{default}'" if isinstance(default, str) else default.compile(dialect=connection.dialect)
+                ddl += f" DEFAULT {default}"
+
+                if not column.nullable:
+                    ddl += " NOT NULL"
+
+            connection.execute(text(ddl))
+            logger.info("Added column %s.%s", table.name, column.name)
+
+        existing_indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+
+        for index in table.indexes:
+            if index.name not in existing_indexes:
+                index.create(connection)
+                logger.info("Created index %s", index.name)
+
 async def create_db_and_tables() -> None:
     """
-    Create all database tables.
+    Create all database tables, and add columns introduced since they were created.
 
     Intended to be executed once during application startup.
     Failure here is considered fatal and should prevent app startup.
@@ -98,6 +256,7 @@ async def create_db_and_tables() -> None:
     try:
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(add_missing_columns)
     except Exception as e:
         logger.exception(f"Database initialization failed: {e}")
         raise
@@ -126,3 +285,19 @@ async def get_user_db(session: AsyncSession = Depends(get_async_session)) -> Asy
     Bridges SQLAlchemy AsyncSession with fastapi-users user persistence.
     """
     yield SQLAlchemyUserDatabase(session, User)
+
+
+async def get_user_emails(session: AsyncSession, user_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, str]:
+    """
+    Map user ids to emails.
+
+    Looked up by bound ids rather than joined: on SQLite, `user.id` and the
+    UUID columns referring to it are stored as differently formatted text,
+    so a join between them matches nothing.
+    """
+    ids = set(user_ids)
+    if not ids:
+        return {}
+
+    rows = await session.execute(select(User.id, User.email).where(User.id.in_(ids)))
+    return {user_id: email for user_id, email in rows.all()}
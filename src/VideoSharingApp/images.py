@@ -1,4 +1,6 @@
 import os
+import base64
+import urllib.parse
 from dotenv import load_dotenv
 from imagekitio import ImageKit
 from functools import lru_cache
@@ -32,4 +34,98 @@ def create_imagekit_client() -> ImageKit:
         return ImageKit(private_key=private_key)
     except Exception as e:
         raise ImageKitConfigError("Failded to initialize an ImageKit client") from e
-        
\ No newline at end of file
+        
+
+# Named ImageKit transformations served to clients, keyed by media type.
+# Changing a value here changes the CDN cache key for every post, so keep them stable.
+IMAGE_VARIANTS = {
+    "thumbnail": "w-150,h-150,c-at_max",
+    "feed": "w-600",
+}
+
+VIDEO_VARIANTS = {
+    "thumbnail": "w-150,h-150,cm-pad_resize,bg-blurred",
+    "feed": "w-400,h-200,cm-pad_resize,bg-blurred",
+    "poster": "w-400,h-200,cm-pad_resize,bg-blurred",
+}
+
+# Variants rendered from the first frame of a video rather than the video itself
+VIDEO_STILL_VARIANTS = {"thumbnail", "poster"}
+
+
+def encode_text_for_overlay(text: str) -> str:
+    """
+    Encode text for an ImageKit text overlay (base64, then URL encoded).
+    """
+    if not text:
+        return ""
+
+    base64_text = base64.b64encode(text.encode("utf-8")).decode("utf-8")
+    return urllib.parse.quote(base64_text)
+
+
+def caption_overlay(caption: str) -> str:
+    """
+    Text overlay placed at the bottom of the media on a semi-transparent background.
+    """
+    return f"l-text,ie-{encode_text_for_overlay(caption)},ly-N20,lx-20,fs-100,co-white,bg-000000A0,l-end"
+
+
+def transform_url(original_url: str, transformation: str, still: bool = False) -> str:
+    """
+    Insert an ImageKit transformation into a URL endpoint.
+
+    Parameters:
+    - original_url (str): URL returned by ImageKit, e.g. https://ik.imagekit.io/<id>/<path>
+    - transformation (str): Transformation string, e.g. "w-600"
+    - still (bool): Request the video thumbnail (first frame) instead of the video itself.
+
+    Returns:
+    - str: Transformed URL, or the original URL if it is not an ImageKit endpoint URL.
+    """
+    parts = original_url.split("/")
+
+    if len(parts) < 5:
+        return original_url
+
+    base_url = "/".join(parts[:4])
+    file_path = "/".join(parts[4:])
+
+    if still:
+        file_path = f"{file_path}/ik-thumbnail.jpg"
+
+    if not transformation:
+        return f"{base_url}/{file_path}"
+
+    return f"{base_url}/tr:{transformation}/{file_path}"
+
+
+@lru_cache(maxsize=4096) # Feed pages repeat the same posts; build each post's URLs only once
+def _build_media_variants(original_url: str, file_type: str, caption: str) -> tuple[tuple[str, str], ...]:
+    if file_type == "video":
+        return tuple(
+            (name, transform_url(original_url, transformation, still=name in VIDEO_STILL_VARIANTS))
+            for name, transformation in VIDEO_VARIANTS.items()
+        )
+
+    variants = []
+    for name, transformation in IMAGE_VARIANTS.items():
+        # Only the full-width rendition carries the caption; it is unreadable on a thumbnail
+        if name == "feed" and caption:
+            transformation = f"{transformation}:{caption_overlay(caption)}"
+        variants.append((name, transform_url(original_url, transformation)))
+
+    return tuple(variants)
+
+
+def build_media_variants(original_url: str, file_type: str, caption: str | None = None) -> dict[str, str]:
+    """
+    Precomputed, correctly sized rendition URLs for a post.
+
+    Results are memoized per (url, file_type, caption), so repeated feed
+    requests do no string work and always produce identical CDN cache keys.
+
+    Returns:
+    - dict[str, str]: Variant name to URL, e.g. {"thumbnail": ..., "feed": ...}.
+    """
+    return dict(_build_media_variants(original_url, file_type, caption or ""))
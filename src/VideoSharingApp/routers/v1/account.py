@@ -0,0 +1,81 @@
+import uuid
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+from fastapi import APIRouter, HTTPException, Depends
+
+from VideoSharingApp.database import User
+from VideoSharingApp.users import current_active_user
+from VideoSharingApp.core.dependencies import get_account_deletions
+from VideoSharingApp.core.account_deletion import AccountDeletionJobs
+from VideoSharingApp.utils.logger import get_logger
+from VideoSharingApp.utils.timestamps import as_utc
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/account", tags=["account"])
+
+
+class AccountDeletionStatus(BaseModel):
+    """
+    Progress of a background account deletion.
+    """
+    job_id: uuid.UUID
+    status: str  # pending | running | completed | failed
+    total_posts: int
+    deleted_posts: int
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+def deletion_status(job) -> AccountDeletionStatus:
+    return AccountDeletionStatus(
+        job_id=job.id,
+        status=job.status,
+        total_posts=job.total_posts,
+        deleted_posts=job.deleted_posts,
+        started_at=as_utc(job.started_at),
+        finished_at=as_utc(job.finished_at),
+    )
+
+
+@router.delete("", response_model=AccountDeletionStatus, status_code=202)
+async def delete_account(
+    user: User = Depends(current_active_user),
+    account_deletions: AccountDeletionJobs = Depends(get_account_deletions),
+):
+    """
+    Delete the authenticated user's account and all of their posts.
+
+    The account is deactivated immediately; posts and remote media are
+    removed in the background. Poll the returned job id for progress.
+    """
+    try:
+        job = await account_deletions.schedule(user.id)
+        return deletion_status(job)
+
+    except Exception as e:
+        logger.exception("Failed to start account deletion")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+@router.get("/deletion/{job_id}", response_model=AccountDeletionStatus)
+async def get_account_deletion(
+    job_id: uuid.UUID,
+    account_deletions: AccountDeletionJobs = Depends(get_account_deletions),
+):
+    """
+    Progress of an account deletion.
+
+    Served from the database, so any worker can answer. Not authenticated:
+    the account is deactivated once deletion starts, so its tokens no
+    longer work. The random job id acts as the capability and
+    the response contains only progress counters.
+    """
+    job = await account_deletions.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+
+    return deletion_status(job)
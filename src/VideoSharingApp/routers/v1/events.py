@@ -0,0 +1,134 @@
+import os
+import json
+import random
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Request, Query, Depends, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+
+from VideoSharingApp.core.dependencies import get_event_hub
+from VideoSharingApp.core.events import EventHub, FeedEvent
+from VideoSharingApp.users import bearer_token, get_user_from_token
+from VideoSharingApp.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+router = APIRouter(prefix="/feed", tags=["events"])
+
+HEARTBEAT_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+# Streams are closed after this long (plus up to 10% jitter) and the client
+# reconnects and resumes, so no connection pins a worker indefinitely
+STREAM_MAX_SECONDS = float(os.getenv("EVENTS_STREAM_MAX_SECONDS", 600))
+
+
+def _stream_deadline() -> float:
+    return asyncio.get_running_loop().time() + STREAM_MAX_SECONDS * random.uniform(1.0, 1.1)
+
+
+def _seconds_left(deadline: float) -> float:
+    return deadline - asyncio.get_running_loop().time()
+
+
+def _format_sse(event: FeedEvent) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data, separators=(',', ':'))}\n\n"
+
+
+@router.get("/events")
+async def stream_feed_events(
+    request: Request,
+    access_token: Optional[str] = Query(None, description="For EventSource clients that cannot set headers."),
+    last_event_id: Optional[str] = Query(None, description="Resume after this event id."),
+    hub: EventHub = Depends(get_event_hub),
+):
+    """
+    Stream feed changes as Server-Sent Events.
+
+    Emits `post.created` and `post.deleted` events. A `reset` event means
+    the requested resume point is gone and the client should reload the feed.
+    The stream ends after EVENTS_STREAM_MAX_SECONDS or when the worker shuts
+    down; clients reconnect with Last-Event-ID.
+    """
+    user = await get_user_from_token(bearer_token(request.headers.get("Authorization")) or access_token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    resume_from = request.headers.get("Last-Event-ID") or last_event_id
+    subscription, resumed = hub.subscribe(resume_from)
+
+    async def event_stream():
+        deadline = _stream_deadline()
+
+        try:
+            yield f"retry: {RETRY_MILLISECONDS}\n\n"
+
+            if not resumed:
+                yield "event: reset\ndata: {}\n\n"
+
+            while not subscription.exhausted and _seconds_left(deadline) > 0:
+                if await request.is_disconnected():
+                    break
+
+                event = await subscription.get(timeout=min(HEARTBEAT_SECONDS, _seconds_left(deadline)))
+                if event is not None:
+                    yield _format_sse(event)
+                elif not subscription.dropped:
+                    yield ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def feed_events_websocket(
+    websocket: WebSocket,
+    access_token: Optional[str] = Query(None),
+    last_event_id: Optional[str] = Query(None),
+):
+    """
+    Stream feed changes over a WebSocket as JSON messages.
+
+    Same events, resume semantics and lifetime as `/feed/events`. The
+    socket is closed with 1001 (going away) when the client should reconnect.
+    """
+    hub: EventHub = getattr(websocket.app.state, "event_hub", None)
+    user = await get_user_from_token(access_token)
+
+    if hub is None or user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscription, resumed = hub.subscribe(last_event_id)
+
+    deadline = _stream_deadline()
+
+    try:
+        if not resumed:
+            await websocket.send_json({"type": "reset", "data": {}})
+
+        while not subscription.exhausted and _seconds_left(deadline) > 0:
+            event = await subscription.get(timeout=min(HEARTBEAT_SECONDS, _seconds_left(deadline)))
+            if event is not None:
+                await websocket.send_text(event.to_json())
+            elif not subscription.dropped:
+                await websocket.send_json({"type": "keep-alive"})
+
+        if subscription.dropped and not subscription.closing:
+            # Dropped as a slow consumer; the client should reconnect and resume
+            await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        else:
+            await websocket.close(code=status.WS_1001_GOING_AWAY)
+
+    except WebSocketDisconnect:
+        pass
+
+    finally:
+        subscription.close()
@@ -1,35 +1,243 @@
-from fastapi import APIRouter, Depends
+import os
+import json
+import math
+import time
+import uuid
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, or_, and_, Row
 
-from VideoSharingApp.database import get_async_session, Post, User
+from VideoSharingApp.database import get_async_session, get_user_emails, Post, PostLike, User
 from VideoSharingApp.users import current_active_user
+from VideoSharingApp.images import build_media_variants
+from VideoSharingApp.core.dependencies import get_counter_buffer
+from VideoSharingApp.core.counters import CounterBuffer, VIEWS
+from VideoSharingApp.utils.pagination import encode_cursor, decode_cursor, keyset_column, keyset_value
 
 router = APIRouter(prefix="/feed", tags=["feed"])
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Fields excluded from feed ETags, and how stale they may get on a revalidated page
+VOLATILE_FIELDS = ("like_count", "view_count")
+COUNTS_MAX_AGE_SECONDS = max(int(os.getenv("FEED_COUNTS_MAX_AGE", 60)), 1)
+
+
+def serialize_post(post: Post, email: Optional[str], user: User, liked: bool = False) -> dict:
+    """
+    Feed representation of a post, as seen by `user`.
+    """
+    return {
+        "id": str(post.id),
+        "user_id": str(post.user_id),
+        "caption": post.caption,
+        "url": post.image_url,
+        "variants": build_media_variants(post.image_url, post.file_type, post.caption),
+        "file_name": post.file_name,
+        "file_type": post.file_type,
+        "created_at": post.created_at.isoformat(),
+        "mime_type": post.mime_type,
+        "size_bytes": post.size_bytes,
+        "width": post.width,
+        "height": post.height,
+        "duration_seconds": post.duration_seconds,
+        "is_owner": post.user_id == user.id,
+        "email": email,
+        "like_count": post.like_count,
+        "view_count": post.view_count,
+        "liked": liked,
+    }
+
+
+def compute_etag(payload: dict) -> str:
+    """
+    Weak validator derived from the serialized response body.
+
+    Like/view counts are left out: serving a page counts views, so they
+    change with nearly every request and would defeat revalidation. A
+    time bucket is hashed in instead, so a revalidated page picks up fresh
+    counts at most FEED_COUNTS_MAX_AGE seconds late.
+    """
+    basis = {
+        **payload,
+        "posts": [
+            {name: value for name, value in post.items() if name not in VOLATILE_FIELDS}
+            for post in payload.get("posts", [])
+        ],
+        "counts_epoch": int(time.time() // COUNTS_MAX_AGE_SECONDS),
+    }
+    body = json.dumps(basis, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    Whether the client's If-None-Match header already covers `etag` (weak comparison).
+    """
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates or "*" in candidates
+
+
+def cached_json_response(request: Request, payload: dict) -> Response:
+    """
+    JSON response with an ETag, or 304 Not Modified if the client's copy is current.
+    """
+    etag = compute_etag(payload)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=payload, headers=headers)
+
+
+async def feed_page_response(
+    request: Request,
+    session: AsyncSession,
+    user: User,
+    counters: CounterBuffer,
+    query,
+    limit: int,
+    cursor_of: Callable[[Row], str],
+    count_views: bool = True,
+) -> Response:
+    """
+    Run a feed query fetching `limit + 1` (post, ...) rows and build
+    the page response. `cursor_of` builds `next_cursor` from the last row.
+
+    With `count_views`, every post served counts as a view. Views are
+    buffered and written in batches, so counts shown lag slightly behind.
+    """
+    rows = (await session.execute(query)).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    page_ids = [row[0].id for row in rows]
+    emails = await get_user_emails(session, (row[0].user_id for row in rows))
+    liked_ids = set()
+    if page_ids:
+        liked_ids = set((await session.execute(
+            select(PostLike.post_id).where(PostLike.user_id == user.id, PostLike.post_id.in_(page_ids))
+        )).scalars().all())
+
+    if count_views:
+        for post_id in page_ids:
+            counters.increment(post_id, VIEWS)
+
+    payload = {
+        "posts": [serialize_post(post, emails.get(post.user_id), user, post.id in liked_ids) for post, *_ in rows],
+        "next_cursor": cursor_of(rows[-1]) if has_more else None,
+    }
+
+    return cached_json_response(request, payload)
+
+
+def parse_cursor(cursor: str, length: int) -> list:
+    try:
+        return decode_cursor(cursor, length)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/")
-async def get_feed(session: AsyncSession = Depends(get_async_session), user: User = Depends(current_active_user)) -> dict[str, list]:
-    """
-    Fetch the global feed ordered by most recent posts.
-    """
-    posts = (await session.execute(select(Post).order_by(Post.created_at.desc()))).scalars().all()
-
-    users = (await session.execute(select(User))).scalars().all()
-    users_map = {u.id: u.email for u in users}
-
-    posts_data = [
-        {
-            "id": str(post.id),
-            "user_id": str(post.user_id),
-            "caption": post.caption,
-            "url": post.image_url,
-            "file_name": post.file_name,
-            "file_type": post.file_type,
-            "created_at": post.created_at.isoformat(),
-            "is_owner": post.user_id == user.id,
-            "email": users_map.get(post.user_id)
-        }
-        for post in posts
-    ]
-
-    return {"posts": posts_data}
+async def get_feed(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page."),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+    counters: CounterBuffer = Depends(get_counter_buffer),
+) -> Response:
+    """
+    Fetch the global feed ordered by most recent posts, one page at a time.
+
+    Pages are keyset-paginated on (created_at, id); the cursor carries both,
+    so it stays valid if the post it points at is deleted. Responses carry
+    an ETag so clients can revalidate a cached page with If-None-Match.
+    """
+    created_at = keyset_column(Post.created_at)
+
+    query = (
+        select(Post, created_at.label("cursor_created_at"))
+        .order_by(Post.created_at.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+
+    if cursor:
+        raw_created_at, raw_id = parse_cursor(cursor, 2)
+        try:
+            cursor_created_at = keyset_value(Post.created_at, raw_created_at)
+            cursor_id = uuid.UUID(raw_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        query = query.where(
+            or_(
+                created_at < cursor_created_at,
+                and_(created_at == cursor_created_at, Post.id < cursor_id),
+            )
+        )
+
+    def cursor_of(row: Row) -> str:
+        return encode_cursor(row.cursor_created_at, row.Post.id)
+
+    return await feed_page_response(request, session, user, counters, query, limit, cursor_of)
+
+
+@router.get("/trending")
+async def get_trending_feed(
+    request: Request,
+    cursor: Optional[str] = Query(None, description="`next_cursor` from the previous page."),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+    counters: CounterBuffer = Depends(get_counter_buffer),
+) -> Response:
+    """
+    Fetch the feed ordered by trending score, one page at a time.
+
+    Scores are precomputed (see core.trending), so a page is a range scan
+    of the score index. Pages are keyset-paginated on (trending_score, id),
+    and the cursor carries both; a post rescored between two page requests
+    may move across the cursor.
+
+    Impressions here do not count as views: views feed the score, so
+    counting them would keep whatever is already trending on top.
+    """
+    query = (
+        select(Post)
+        .where(Post.trending_score.is_not(None))
+        .order_by(Post.trending_score.desc(), Post.id.desc())
+        .limit(limit + 1)
+    )
+
+    if cursor:
+        cursor_score, raw_id = parse_cursor(cursor, 2)
+        try:
+            if isinstance(cursor_score, bool) or not math.isfinite(cursor_score):
+                raise ValueError("Invalid score")
+            cursor_id = uuid.UUID(raw_id)
+        except (TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+        query = query.where(
+            or_(
+                Post.trending_score < cursor_score,
+                and_(Post.trending_score == cursor_score, Post.id < cursor_id),
+            )
+        )
+
+    def cursor_of(row: Row) -> str:
+        return encode_cursor(row.Post.trending_score, row.Post.id)
+
+    return await feed_page_response(request, session, user, counters, query, limit, cursor_of, count_views=False)
@@ -1,22 +1,51 @@
-import shutil, os, uuid, tempfile
+import shutil, os, uuid, tempfile, asyncio, json
 from uuid import UUID
+from typing import Optional
 from pydantic import BaseModel, ConfigDict
-from datetime import datetime
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request
+from fastapi import APIRouter, HTTPException, UploadFile, File, Form, Depends, Request, Query, Header
+from fastapi.responses import StreamingResponse
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, delete, insert, or_, and_
+from sqlalchemy.exc import IntegrityError
 
-from VideoSharingApp.database import get_async_session, Post, User
-from VideoSharingApp.users import current_active_user
-from VideoSharingApp.core.dependencies import get_imagekit
+from VideoSharingApp.database import get_async_session, get_user_emails, async_session_maker, engine, Post, PostLike, User
+from VideoSharingApp.users import current_active_user, current_active_user_detached
+from VideoSharingApp.core.dependencies import (
+    get_imagekit, get_event_hub, get_counter_buffer, get_asset_cleanup, get_idempotency_store,
+)
+from VideoSharingApp.core.asset_cleanup import AssetCleanupQueue
+from VideoSharingApp.core.counters import CounterBuffer, LIKES
+from VideoSharingApp.core.events import EventHub, POST_CREATED, POST_DELETED
+from VideoSharingApp.core.idempotency import IdempotencyStore, IdempotencyConflict, request_fingerprint
+from VideoSharingApp.core.rollups import record_posts
+from VideoSharingApp.core.trending import trending_score
+from VideoSharingApp.core.profiling import timed_span
+from VideoSharingApp.core.upload_limits import UploadRejected, validate_upload
 from VideoSharingApp.utils.logger import get_logger
+from VideoSharingApp.utils.media_probe import MediaMetadata, probe_media
+from VideoSharingApp.utils.pagination import keyset_column
 
 logger = get_logger(__name__)
 
 router = APIRouter(prefix="/posts", tags=["posts"])
 
+# Batch upload limits
+MAX_BATCH_FILES = int(os.getenv("MAX_BATCH_FILES", 20))
+UPLOAD_CONCURRENCY = int(os.getenv("UPLOAD_CONCURRENCY", 4))  # parallel storage transfers per request
+
+# Rows fetched from the database cursor per round-trip while exporting
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", 1000))
+
+# Columns included in exports (internal storage ids are left out)
+EXPORT_COLUMNS = (
+    Post.id, Post.user_id, Post.caption, Post.image_url, Post.file_name, Post.file_type,
+    Post.mime_type, Post.size_bytes, Post.width, Post.height, Post.duration_seconds,
+    Post.like_count, Post.view_count, Post.created_at,
+)
+
 class PostRead(BaseModel):
     """
     Public-facing representation of a Post object.
@@ -32,11 +61,27 @@ class PostRead(BaseModel):
     image_url: str
     file_type: str  # Expected values: "image" | "video"
     created_at: datetime
+    mime_type: Optional[str] = None
+    size_bytes: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration_seconds: Optional[float] = None
 
     # Enables creation of this schema directly from SQLAlchemy ORM objects
     model_config = ConfigDict(from_attributes=True)
 
 
+async def publish_feed_event(hub: EventHub, event_type: str, data: dict) -> None:
+    """
+    Notify connected feed clients. The post change is already committed,
+    so a failure here is logged rather than failing the request.
+    """
+    try:
+        await hub.publish(event_type, data)
+    except Exception:
+        logger.exception(f"Failed to publish feed event: {event_type}")
+
+
 class PostDeleteResponse(BaseModel):
     """
     Standard response schema for successful delete operations.
@@ -48,30 +93,63 @@ class PostDeleteResponse(BaseModel):
     success: bool
 
 
-@router.post("/upload", response_model=PostRead)
-async def upload_file(
-    request: Request,
-    file: UploadFile = File(...),
-    caption: str = Form(""),
-    user: User = Depends(current_active_user),
-    session: AsyncSession = Depends(get_async_session),
-    imagekit=Depends(get_imagekit)
-):
+class BatchUploadItem(BaseModel):
+    """
+    Outcome of a single file within a batch upload.
+    """
+    file_name: str
+    success: bool
+    post: Optional[PostRead] = None
+    error: Optional[str] = None
+
+
+class BatchUploadResponse(BaseModel):
+    """
+    Per-file results of a batch upload, in the order the files were sent.
+    """
+    results: list[BatchUploadItem]
+
+
+class PostLikeResponse(BaseModel):
+    """
+    Like state of a post for the authenticated user.
+
+    Like counts shown in the feed are updated in batches, so they may
+    lag behind this response by a few seconds.
+    """
+    liked: bool
+
+
+def parse_post_id(post_id: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(post_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid post ID")
+
+
+def transfer_to_storage(imagekit, file: UploadFile) -> tuple[object, MediaMetadata]:
+    """
+    Copy an uploaded file to disk, extract its media metadata and send it to ImageKit.
+
+    Blocking; run it in a worker thread so the event loop keeps serving
+    other requests while the transfer is in flight.
+
+    Returns:
+    - tuple: ImageKit upload result, and the metadata probed from the file.
     """
-    Upload an image or video and create a post owned by the authenticated user.
-    """ 
-    
     temp_file_path = None
-    upload_result = None
-    
+
     try:
         suffix = os.path.splitext(file.filename)[-1]
 
         with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
             temp_file_path = temp_file.name
             shutil.copyfileobj(file.file, temp_file)
-        
-        with open(temp_file_path, "rb") as f:
+
+        with timed_span("probe"):
+            metadata = probe_media(temp_file_path)
+
+        with open(temp_file_path, "rb") as f, timed_span("storage"):
             upload_result = imagekit.files.upload(
                 file=f,
                 file_name=file.filename,
@@ -79,61 +157,416 @@ async def upload_file(
                 tags=["backend-upload"],
             )
 
-        post = Post(
-            user_id = user.id,
-            caption=caption,
-            image_url=upload_result.url,
-            file_type="video" if file.content_type.startswith("video/") else "image",
-            file_name=upload_result.name,
+        return upload_result, metadata
+
+    finally:
+        if temp_file_path and os.path.exists(temp_file_path):
+            os.unlink(temp_file_path)
+
+
+def new_post_values(user: User, file: UploadFile, caption: str, upload_result, metadata: MediaMetadata) -> dict:
+    """
+    Column values for a post created from a stored upload.
+
+    The media type sniffed from the file contents takes precedence over the
+    client-supplied content type.
+    """
+    content_type = metadata.mime_type or file.content_type or ""
+
+    return {
+        "user_id": user.id,
+        "caption": caption,
+        "image_url": upload_result.url,
+        "file_type": "video" if content_type.startswith("video/") else "image",
+        "file_name": upload_result.name,
+        "file_id": upload_result.file_id,
+        "mime_type": metadata.mime_type or file.content_type,
+        "size_bytes": metadata.size_bytes,
+        "width": metadata.width,
+        "height": metadata.height,
+        "duration_seconds": metadata.duration_seconds,
+        "trending_score": trending_score(0, 0, datetime.now(timezone.utc)),
+    }
+
+
+def post_created_event(post: Post) -> dict:
+    return {
+        "id": str(post.id),
+        "user_id": str(post.user_id),
+        "file_type": post.file_type,
+        "created_at": post.created_at.isoformat(),
+    }
+
+
+def _export_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+@router.get("/export")
+async def export_posts(
+    scope: str = Query("own", pattern="^(own|all)$", description="`all` requires a superuser."),
+    user: User = Depends(current_active_user_detached),
+):
+    """
+    Export posts as newline-delimited JSON (one post per line), oldest first.
+
+    Rows are fetched in batches of EXPORT_BATCH_SIZE, so memory use is flat
+    and the first line is sent immediately regardless of the size of the
+    export. Databases with MVCC stream from one server-side cursor. On
+    SQLite an open read transaction would hold a lock for as long as the
+    client takes to download, blocking every write, so there each batch is
+    a keyset page read in its own short session.
+    """
+    if scope == "all" and not user.is_superuser:
+        raise HTTPException(status_code=403, detail="Not authorized.")
+
+    query = (
+        select(*EXPORT_COLUMNS)
+        .order_by(Post.created_at, Post.id)
+    )
+
+    if scope == "own":
+        query = query.where(Post.user_id == user.id)
+
+    async def to_lines(session: AsyncSession, rows) -> str:
+        emails = await get_user_emails(session, (row.user_id for row in rows))
+        lines = []
+
+        for row in rows:
+            record = {}
+            for name, value in row._mapping.items():
+                if name == "cursor_created_at":
+                    continue
+                record[name] = value
+                if name == "user_id":
+                    record["email"] = emails.get(value)
+            lines.append(json.dumps(record, default=_export_default) + "\n")
+
+        return "".join(lines)
+
+    async def streamed_lines():
+        async with async_session_maker() as session, async_session_maker() as lookup_session:
+            result = await session.stream(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+            async for partition in result.partitions():
+                yield await to_lines(lookup_session, partition)
+
+    async def paged_lines():
+        created_at = keyset_column(Post.created_at)
+        paged = query.add_columns(created_at.label("cursor_created_at")).limit(EXPORT_BATCH_SIZE)
+        last = None
+
+        while True:
+            page = paged
+            if last is not None:
+                page = page.where(or_(created_at > last[0], and_(created_at == last[0], Post.id > last[1])))
+
+            async with async_session_maker() as session:
+                rows = (await session.execute(page)).all()
+                lines = await to_lines(session, rows)
+
+            if not rows:
+                return
+
+            last = (rows[-1].cursor_created_at, rows[-1].id)
+            yield lines
+
+            if len(rows) < EXPORT_BATCH_SIZE:
+                return
+
+    return StreamingResponse(
+        paged_lines() if engine.dialect.name == "sqlite" else streamed_lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="posts-export.ndjson"'},
+    )
+
+
+@router.post("/upload", response_model=PostRead)
+async def upload_file(
+    request: Request,
+    file: UploadFile = File(...),
+    caption: str = Form(""),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+    imagekit=Depends(get_imagekit),
+    hub: EventHub = Depends(get_event_hub),
+    asset_cleanup: AssetCleanupQueue = Depends(get_asset_cleanup),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
+):
+    """
+    Upload an image or video and create a post owned by the authenticated user.
+
+    The file's real type is sniffed and its size checked before it is
+    copied or sent to storage (415 / 413 on failure).
+
+    With an `Idempotency-Key` header, a retried request returns the original
+    response instead of creating another post (422 if the key was used with
+    a different file or caption).
+    """
+    async def create_post() -> dict:
+        try:
+            validate_upload(file)
+
+            upload_result, metadata = await asyncio.to_thread(transfer_to_storage, imagekit, file)
+
+            post = Post(**new_post_values(user, file, caption, upload_result, metadata))
+
+            try:
+                session.add(post)
+
+                # Insert and read back server defaults first, so rollups commit with the post
+                await session.flush()
+                await session.refresh(post)
+                await record_posts(session, [post])
+
+                await session.commit()
+
+            except Exception:
+                # Don't leave the stored file orphaned
+                await session.rollback()
+                asset_cleanup.enqueue([upload_result.file_id])
+                raise
+
+            await publish_feed_event(hub, POST_CREATED, post_created_event(post))
+
+            return PostRead.model_validate(post).model_dump(mode="json")
+
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+
+        except Exception as e:
+            logger.exception(f"Failed to upload post: {e}")
+            raise HTTPException(status_code=500, detail="Upload failed") from e
+
+    try:
+        if idempotency_key is None:
+            return await create_post()
+
+        fingerprint = await asyncio.to_thread(
+            request_fingerprint, request.method, request.url.path, {"caption": caption}, file.file
         )
+        return await idempotency.run(user.id, idempotency_key, fingerprint, create_post)
 
-        session.add(post)
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
 
-        await session.commit()
-        await session.refresh(post)
+    finally:
+        await file.close()
+
+
+@router.post("/upload/batch", response_model=BatchUploadResponse)
+async def upload_batch(
+    files: list[UploadFile] = File(...),
+    captions: list[str] = Form([]),
+    user: User = Depends(current_active_user),
+    session: AsyncSession = Depends(get_async_session),
+    imagekit=Depends(get_imagekit),
+    hub: EventHub = Depends(get_event_hub),
+    asset_cleanup: AssetCleanupQueue = Depends(get_asset_cleanup),
+):
+    """
+    Upload several images or videos in one request, e.g. an album.
+
+    Files are sent to storage concurrently (at most UPLOAD_CONCURRENCY at a
+    time) and all resulting posts are inserted in one transaction. Captions
+    are matched to files by position. Results are reported per file, so a
+    client only needs to retry the files that failed. Files failing type or
+    size validation are reported without being sent to storage. If the
+    posts cannot be saved, every stored file is reported as failed and
+    queued for removal from storage.
+    """
+    if len(files) > MAX_BATCH_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_FILES} files per batch")
+
+    semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+
+    async def transfer(file: UploadFile):
+        # Invalid files are rejected here, without a storage round-trip
+        validate_upload(file)
+
+        async with semaphore:
+            return await asyncio.to_thread(transfer_to_storage, imagekit, file)
+
+    try:
+        outcomes = await asyncio.gather(*(transfer(file) for file in files), return_exceptions=True)
+
+        results: list[BatchUploadItem] = []
+        rows: list[dict] = []
+        stored_indexes: list[int] = []
+
+        for index, (file, outcome) in enumerate(zip(files, outcomes)):
+            results.append(BatchUploadItem(file_name=file.filename, success=False))
+
+            if isinstance(outcome, UploadRejected):
+                results[index].error = outcome.detail
+                continue
+
+            if isinstance(outcome, BaseException):
+                logger.error(f"Failed to store batch file {file.filename}: {outcome}")
+                results[index].error = "Upload failed"
+                continue
+
+            caption = captions[index] if index < len(captions) else ""
+            upload_result, metadata = outcome
+            rows.append(new_post_values(user, file, caption, upload_result, metadata))
+            stored_indexes.append(index)
+
+        if rows:
+            try:
+                # One multi-row INSERT ... RETURNING for every stored file
+                posts = (await session.scalars(insert(Post).returning(Post, sort_by_parameter_order=True), rows)).all()
+                await record_posts(session, posts)
+                await session.commit()
+
+            except Exception:
+                logger.exception(f"Failed to save {len(rows)} batch posts; removing their stored files.")
+                await session.rollback()
+                asset_cleanup.enqueue(row["file_id"] for row in rows)
+
+                for index in stored_indexes:
+                    results[index].error = "Upload failed"
+
+                return BatchUploadResponse(results=results)
+
+            for index, post in zip(stored_indexes, posts):
+                results[index].success = True
+                results[index].post = PostRead.model_validate(post)
+                await publish_feed_event(hub, POST_CREATED, post_created_event(post))
+
+        return BatchUploadResponse(results=results)
 
-        return post
-    
     except Exception as e:
-        logger.exception(f"Failed to upload post: {e}")
+        logger.exception(f"Failed to upload batch: {e}")
         raise HTTPException(status_code=500, detail="Upload failed") from e
 
     finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
-        await file.close()
+        for file in files:
+            await file.close()
 
 
 @router.delete("/{post_id}", response_model=PostDeleteResponse)
 async def delete_post(
     post_id: str,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255),
     session: AsyncSession = Depends(get_async_session),
-    user: User = Depends(current_active_user)
+    user: User = Depends(current_active_user),
+    hub: EventHub = Depends(get_event_hub),
+    asset_cleanup: AssetCleanupQueue = Depends(get_asset_cleanup),
+    idempotency: IdempotencyStore = Depends(get_idempotency_store),
 ):
     """
     Delete a post owned by the authenticated user.
+    The remote media file is removed in the background.
+
+    With an `Idempotency-Key` header, a retried request returns the original
+    response (rather than 404 for the now-deleted post).
     """
-    try:
+    async def remove_post() -> dict:
         try:
-            post_uuid = uuid.UUID(post_id)
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid post ID")
+            post_uuid = parse_post_id(post_id)
+
+            result = await session.execute(select(Post).where(Post.id == post_uuid))
+            post = result.scalars().first()
+
+            if not post:
+                raise HTTPException(status_code=404, detail="Post not found")
+
+            if post.user_id != user.id:
+                raise HTTPException(status_code=403, detail="Not authorized.")
+
+            await session.execute(delete(PostLike).where(PostLike.post_id == post_uuid))
+            await session.delete(post)
+            await record_posts(session, [post], sign=-1)
+            await session.commit()
+
+            asset_cleanup.enqueue([post.file_id])
+
+            await publish_feed_event(hub, POST_DELETED, {"id": str(post_uuid)})
+
+            return PostDeleteResponse(success=True).model_dump()
+
+        except HTTPException:
+            raise
 
-        result = await session.execute(select(Post).where(Post.id == post_uuid))
-        post = result.scalars().first()
+        except Exception as e:
+            logger.exception("Failed to delete post")
+            raise HTTPException(status_code=500, detail="Internal server error") from e
+
+    if idempotency_key is None:
+        return await remove_post()
+
+    try:
+        fingerprint = request_fingerprint(request.method, request.url.path)
+        return await idempotency.run(user.id, idempotency_key, fingerprint, remove_post)
+
+    except IdempotencyConflict as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail) from e
+
+
+@router.post("/{post_id}/like", response_model=PostLikeResponse)
+async def like_post(
+    post_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+    counters: CounterBuffer = Depends(get_counter_buffer),
+):
+    """
+    Like a post. Liking an already liked post is a no-op.
+    """
+    post_uuid = parse_post_id(post_id)
 
-        if not post:
+    try:
+        exists = (await session.execute(select(Post.id).where(Post.id == post_uuid))).scalar_one_or_none()
+        if exists is None:
             raise HTTPException(status_code=404, detail="Post not found")
-        
-        if post.user_id != user.id:
-            raise HTTPException(status_code=403, detail="Not authorized.")
 
-        await session.delete(post)
+        session.add(PostLike(post_id=post_uuid, user_id=user.id))
+
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+            return PostLikeResponse(liked=True)
+
+        counters.increment(post_uuid, LIKES)
+
+        return PostLikeResponse(liked=True)
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        logger.exception("Failed to like post")
+        raise HTTPException(status_code=500, detail="Internal server error") from e
+
+
+@router.delete("/{post_id}/like", response_model=PostLikeResponse)
+async def unlike_post(
+    post_id: str,
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_active_user),
+    counters: CounterBuffer = Depends(get_counter_buffer),
+):
+    """
+    Remove the authenticated user's like from a post. Unliking twice is a no-op.
+    """
+    post_uuid = parse_post_id(post_id)
+
+    try:
+        result = await session.execute(
+            delete(PostLike).where(PostLike.post_id == post_uuid, PostLike.user_id == user.id)
+        )
         await session.commit()
 
-        return PostDeleteResponse(success=True)
+        if result.rowcount:
+            counters.increment(post_uuid, LIKES, -1)
+
+        return PostLikeResponse(liked=False)
 
     except Exception as e:
-        logger.exception("Failed to delete post")
+        logger.exception("Failed to unlike post")
         raise HTTPException(status_code=500, detail="Internal server error") from e
-    
\ No newline at end of file
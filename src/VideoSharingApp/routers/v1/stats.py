@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, func
+
+from VideoSharingApp.database import get_async_session, get_user_emails, PostRollup, User
+from VideoSharingApp.users import current_superuser
+from VideoSharingApp.core.rollups import bucket_start, HOUR, DAY
+from VideoSharingApp.utils.timestamps import as_utc
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+
+@router.get("/")
+async def get_stats(
+    granularity: str = Query(DAY, pattern=f"^({HOUR}|{DAY})$"),
+    days: int = Query(7, ge=1, le=366),
+    top: int = Query(10, ge=1, le=100),
+    session: AsyncSession = Depends(get_async_session),
+    user: User = Depends(current_superuser),
+) -> dict:
+    """
+    Upload activity over the last `days` days (superusers only).
+
+    Reads only the precomputed rollups, so the cost grows with the number
+    of buckets in the window rather than with the number of posts.
+    """
+    since = bucket_start(datetime.now(timezone.utc), DAY) - timedelta(days=days - 1)
+    window = (PostRollup.granularity == granularity, PostRollup.bucket_start >= since)
+
+    post_count = func.sum(PostRollup.post_count).label("post_count")
+    bytes_total = func.sum(PostRollup.bytes_total).label("bytes_total")
+
+    buckets = (await session.execute(
+        select(PostRollup.bucket_start, PostRollup.file_type, post_count, bytes_total)
+        .where(*window)
+        .group_by(PostRollup.bucket_start, PostRollup.file_type)
+        .order_by(PostRollup.bucket_start, PostRollup.file_type)
+    )).all()
+
+    top_uploaders = (await session.execute(
+        select(PostRollup.user_id, post_count, bytes_total)
+        .where(*window)
+        .group_by(PostRollup.user_id)
+        .order_by(post_count.desc())
+        .limit(top)
+    )).all()
+    emails = await get_user_emails(session, (row.user_id for row in top_uploaders))
+
+    totals: dict[str, dict[str, int]] = {}
+    for row in buckets:
+        total = totals.setdefault(row.file_type, {"post_count": 0, "bytes_total": 0})
+        total["post_count"] += row.post_count
+        total["bytes_total"] += row.bytes_total
+
+    return {
+        "granularity": granularity,
+        "since": since.isoformat(),
+        "buckets": [
+            {
+                "bucket_start": as_utc(row.bucket_start).isoformat(),
+                "file_type": row.file_type,
+                "post_count": row.post_count,
+                "bytes_total": row.bytes_total,
+            }
+            for row in buckets
+        ],
+        "totals": totals,
+        "top_uploaders": [
+            {
+                "user_id": str(row.user_id),
+                "email": emails.get(row.user_id),
+                "post_count": row.post_count,
+                "bytes_total": row.bytes_total,
+            }
+            for row in top_uploaders
+        ],
+    }
@@ -3,12 +3,13 @@ import os
 from typing import Optional
 from dotenv import load_dotenv
 
-from fastapi import Depends, Request
+from fastapi import Depends, HTTPException, Request
 from fastapi_users import BaseUserManager, FastAPIUsers, UUIDIDMixin
 from fastapi_users.authentication import AuthenticationBackend, BearerTransport, JWTStrategy
 from fastapi_users.db import SQLAlchemyUserDatabase
 
-from VideoSharingApp.database import User, get_user_db
+from VideoSharingApp.database import User, get_user_db, async_session_maker
+from VideoSharingApp.core.account_deletion import purge_user_data
 from VideoSharingApp.utils.logger import get_logger
 from VideoSharingApp.constants.auth import AuthPaths, APIVersion
 
@@ -49,6 +50,22 @@ class UserManager(UUIDIDMixin, BaseUserManager[User, uuid.UUID]):
             "Email verification requested",
             extra={"user_id": str(user.id)},
         )
+
+    async def on_before_delete(self, user: User, request: Optional[Request] = None):
+        """
+        Remove the user's posts and likes in bounded batches before the user row
+        is deleted, instead of loading them all through the ORM cascade.
+        """
+        state = request.app.state if request is not None else None
+
+        deleted_posts = await purge_user_data(
+            user.id,
+            asset_cleanup=getattr(state, "asset_cleanup", None),
+            counters=getattr(state, "counters", None),
+        )
+        logger.info("User data purged before delete",
+            extra={"user_id": str(user.id), "posts": deleted_posts},
+        )
     
 async def get_user_manager(user_db: SQLAlchemyUserDatabase = Depends(get_user_db)):
     """
@@ -96,3 +113,51 @@ fastapi_users = FastAPIUsers[User, uuid.UUID](
 )
 
 current_active_user = fastapi_users.current_user(active=True)
+current_superuser = fastapi_users.current_user(active=True, superuser=True)
+
+def bearer_token(authorization: Optional[str]) -> Optional[str]:
+    """
+    Extract the token from an `Authorization: Bearer <token>` header value.
+    """
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() == "bearer" and token.strip():
+        return token.strip()
+    return None
+
+
+async def get_user_from_token(token: Optional[str]) -> Optional[User]:
+    """
+    Resolve an active user from a raw JWT access token.
+
+    Used by long-lived connections (SSE, WebSocket) which cannot hold a
+    request-scoped database session open for their whole lifetime.
+    The session used for the lookup is closed before returning.
+    """
+    if not token:
+        return None
+
+    async with async_session_maker() as session:
+        user_manager = UserManager(SQLAlchemyUserDatabase(session, User))
+        user = await get_jwt_strategy_v1().read_token(token, user_manager)
+
+    if user is None or not user.is_active:
+        return None
+
+    return user
+
+
+async def current_active_user_detached(request: Request) -> User:
+    """
+    Same check as `current_active_user` for a Bearer token, but the lookup
+    session is closed before the endpoint runs.
+
+    Use it for streaming responses: request-scoped dependencies stay open
+    until the response finishes, which would otherwise keep a database
+    transaction open for the whole stream.
+    """
+    user = await get_user_from_token(bearer_token(request.headers.get("Authorization")))
+
+    if user is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return user
@@ -0,0 +1,283 @@
+"""
+Lightweight media inspection for uploaded files.
+
+Reads only headers and container metadata (JPEG/PNG headers, MP4/MOV
+boxes, WebM/Matroska EBML elements) using bounded seeks, so probing a
+multi-gigabyte video costs a handful of small reads and no decoding.
+"""
+import os
+import struct
+from dataclasses import dataclass
+from typing import BinaryIO, Iterator, Optional
+
+# Upper bound on container elements/boxes visited while probing a single file
+MAX_PROBE_ELEMENTS = 4096
+
+# Container boxes/elements read into memory whole (everything else is skipped with a seek)
+MAX_METADATA_BOX_BYTES = 1024
+
+SNIFF_BYTES = 64
+
+
+@dataclass
+class MediaMetadata:
+    """
+    Facts about a media file that clients need before fetching it.
+    """
+    mime_type: Optional[str] = None
+    size_bytes: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    duration_seconds: Optional[float] = None
+
+
+def sniff_mime(header: bytes) -> Optional[str]:
+    """
+    Identify a media type from the first bytes of a file (magic numbers).
+
+    Returns:
+    - str | None: MIME type, or None if the format is not recognised.
+    """
+    if header.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+
+    if header.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+
+    if header[4:8] == b"ftyp":
+        return "video/quicktime" if header[8:12] == b"qt  " else "video/mp4"
+
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        # The EBML header carries the DocType near the start of the file
+        return "video/webm" if b"webm" in header else "video/x-matroska"
+
+    return None
+
+
+def probe_media(path: str) -> MediaMetadata:
+    """
+    Extract size, MIME type, dimensions and duration from a media file on disk.
+
+    Unknown formats and malformed containers are not errors; whatever
+    could not be determined is left as None.
+    """
+    metadata = MediaMetadata(size_bytes=os.path.getsize(path))
+
+    with open(path, "rb") as f:
+        metadata.mime_type = sniff_mime(f.read(SNIFF_BYTES))
+
+        try:
+            if metadata.mime_type == "image/jpeg":
+                _probe_jpeg(f, metadata)
+            elif metadata.mime_type == "image/png":
+                _probe_png(f, metadata)
+            elif metadata.mime_type in {"video/mp4", "video/quicktime"}:
+                _probe_mp4(f, metadata.size_bytes, metadata)
+            elif metadata.mime_type in {"video/webm", "video/x-matroska"}:
+                _probe_ebml(f, metadata.size_bytes, metadata)
+        except (struct.error, ValueError, OSError):
+            pass
+
+    return metadata
+
+
+def _read_exact(f: BinaryIO, size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Unexpected end of file")
+    return data
+
+
+# --- Images ---
+
+def _probe_png(f: BinaryIO, metadata: MediaMetadata) -> None:
+    # Signature (8) + IHDR length (4) + "IHDR" (4), then width and height
+    f.seek(16)
+    metadata.width, metadata.height = struct.unpack(">II", _read_exact(f, 8))
+
+
+# Start-of-frame markers carrying the image dimensions (excludes DHT, JPG and DAC)
+_JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _probe_jpeg(f: BinaryIO, metadata: MediaMetadata) -> None:
+    f.seek(2)
+
+    for _ in range(MAX_PROBE_ELEMENTS):
+        marker_prefix, marker = _read_exact(f, 2)
+        if marker_prefix != 0xFF:
+            return
+
+        # Standalone markers without a length
+        if marker == 0xFF:
+            f.seek(-1, os.SEEK_CUR)
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD9:
+            continue
+
+        (length,) = struct.unpack(">H", _read_exact(f, 2))
+
+        if marker in _JPEG_SOF_MARKERS:
+            _precision, height, width = struct.unpack(">BHH", _read_exact(f, 5))
+            metadata.width, metadata.height = width, height
+            return
+
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+# --- MP4 / QuickTime (ISO base media file format) ---
+
+_MP4_CONTAINERS = {b"moov", b"trak", b"mdia"}
+
+
+def _iter_boxes(f: BinaryIO, start: int, end: int, budget: list[int]) -> Iterator[tuple[bytes, int, int]]:
+    """
+    Yield (type, payload_start, payload_end) for each box between start and end.
+
+    `payload_end` is where the box says it ends, which may be past `end` in
+    a truncated or malformed file; callers clamp or let the read fail.
+    """
+    offset = start
+
+    while offset + 8 <= end and budget[0] > 0:
+        budget[0] -= 1
+
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", _read_exact(f, 8))
+        header_size = 8
+
+        if size == 1:
+            (size,) = struct.unpack(">Q", _read_exact(f, 8))
+            header_size = 16
+        elif size == 0:
+            size = end - offset
+
+        if size < header_size:
+            return
+
+        yield box_type, offset + header_size, offset + size
+        offset += size
+
+
+def _probe_mp4(f: BinaryIO, file_size: int, metadata: MediaMetadata) -> None:
+    budget = [MAX_PROBE_ELEMENTS]
+    stack = [(0, file_size)]
+
+    while stack:
+        start, end = stack.pop()
+
+        for box_type, payload_start, payload_end in _iter_boxes(f, start, end, budget):
+            if box_type in _MP4_CONTAINERS:
+                stack.append((payload_start, min(payload_end, end)))
+
+            elif box_type == b"mvhd" and payload_end - payload_start <= MAX_METADATA_BOX_BYTES:
+                f.seek(payload_start)
+                payload = _read_exact(f, payload_end - payload_start)
+
+                if payload[:1] == b"\x01":
+                    timescale, duration = struct.unpack(">IQ", payload[20:32])
+                else:
+                    timescale, duration = struct.unpack(">II", payload[12:20])
+
+                if timescale:
+                    metadata.duration_seconds = round(duration / timescale, 3)
+
+            elif box_type == b"tkhd" and payload_end - payload_start <= MAX_METADATA_BOX_BYTES:
+                f.seek(payload_end - 8)
+                width, height = struct.unpack(">II", _read_exact(f, 8))
+
+                # 16.16 fixed point; audio tracks report 0x0
+                if width and height and metadata.width is None:
+                    metadata.width, metadata.height = width >> 16, height >> 16
+
+
+# --- WebM / Matroska (EBML) ---
+
+_EBML_SEGMENT = 0x18538067
+_EBML_INFO = 0x1549A966
+_EBML_TIMECODE_SCALE = 0x2AD7B1
+_EBML_DURATION = 0x4489
+_EBML_TRACKS = 0x1654AE6B
+_EBML_TRACK_ENTRY = 0xAE
+_EBML_VIDEO = 0xE0
+_EBML_PIXEL_WIDTH = 0xB0
+_EBML_PIXEL_HEIGHT = 0xBA
+_EBML_CLUSTER = 0x1F43B675
+
+_EBML_CONTAINERS = {_EBML_SEGMENT, _EBML_INFO, _EBML_TRACKS, _EBML_TRACK_ENTRY, _EBML_VIDEO}
+
+
+def _read_vint(f: BinaryIO, keep_marker: bool) -> tuple[int, bool]:
+    """
+    Read an EBML variable-length integer.
+
+    Returns:
+    - tuple[int, bool]: The value, and whether it is the reserved "unknown size" value.
+    """
+    first = _read_exact(f, 1)[0]
+
+    length = 1
+    mask = 0x80
+    while length <= 8 and not first & mask:
+        mask >>= 1
+        length += 1
+
+    if length > 8:
+        raise ValueError("Invalid EBML variable-length integer")
+
+    value = first if keep_marker else first & (mask - 1)
+    unknown = not keep_marker and value == mask - 1
+
+    for byte in _read_exact(f, length - 1):
+        value = (value << 8) | byte
+        unknown = unknown and byte == 0xFF
+
+    return value, unknown
+
+
+def _read_uint(f: BinaryIO, size: int) -> int:
+    return int.from_bytes(_read_exact(f, size), "big")
+
+
+def _probe_ebml(f: BinaryIO, file_size: int, metadata: MediaMetadata) -> None:
+    timecode_scale = 1_000_000  # nanoseconds per tick (Matroska default)
+    duration_ticks = None
+
+    f.seek(0)
+    stack = [file_size]
+
+    for _ in range(MAX_PROBE_ELEMENTS):
+        # Close every container the cursor has moved past
+        while stack and f.tell() >= stack[-1]:
+            stack.pop()
+        if not stack:
+            break
+
+        element_id, _ = _read_vint(f, keep_marker=True)
+        size, unknown_size = _read_vint(f, keep_marker=False)
+        payload_start = f.tell()
+
+        if element_id == _EBML_CLUSTER:
+            # Media data follows; everything needed is declared before the first cluster
+            break
+
+        if element_id in _EBML_CONTAINERS:
+            stack.append(file_size if unknown_size else payload_start + size)
+            continue
+
+        if unknown_size:
+            break
+
+        if element_id == _EBML_TIMECODE_SCALE:
+            timecode_scale = _read_uint(f, size)
+        elif element_id == _EBML_DURATION and size in {4, 8}:
+            (duration_ticks,) = struct.unpack(">f" if size == 4 else ">d", _read_exact(f, size))
+        elif element_id == _EBML_PIXEL_WIDTH and metadata.width is None:
+            metadata.width = _read_uint(f, size)
+        elif element_id == _EBML_PIXEL_HEIGHT and metadata.height is None:
+            metadata.height = _read_uint(f, size)
+
+        f.seek(payload_start + size)
+
+    if duration_ticks is not None:
+        metadata.duration_seconds = round(duration_ticks * timecode_scale / 1_000_000_000, 3)
@@ -0,0 +1,74 @@
+"""
+Opaque keyset pagination cursors.
+
+A cursor carries the sort key values of the last row served, so the next
+page is found without looking that row up again (it may have been deleted
+or re-ranked in between).
+"""
+import json
+import uuid
+import base64
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import DateTime, String, type_coerce
+
+from VideoSharingApp.database import engine
+
+
+def keyset_column(column):
+    """
+    Column expression to sort-compare and read cursor values from.
+
+    SQLite keeps timestamps as text, and server-default timestamps are
+    stored without the microseconds SQLAlchemy adds to bound values, so
+    they would not compare equal to themselves. There, timestamps are read
+    and compared as the stored text. Other databases use the column as is.
+    """
+    if engine.dialect.name == "sqlite" and isinstance(column.type, DateTime):
+        return type_coerce(column, String)
+    return column
+
+
+def keyset_value(column, raw: Any) -> Any:
+    """
+    Convert a decoded cursor value back into a bind value for `column`.
+    """
+    if isinstance(column.type, DateTime) and engine.dialect.name != "sqlite":
+        return datetime.fromisoformat(raw)
+    return raw
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cursor")
+
+
+def encode_cursor(*values: Any) -> str:
+    """
+    Pack sort key values into an opaque, URL-safe cursor.
+    """
+    raw = json.dumps(values, default=_json_default, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, length: int) -> list:
+    """
+    Unpack a cursor produced by `encode_cursor`.
+
+    Raises:
+    - ValueError: If the cursor is malformed or has the wrong number of values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError("Malformed cursor") from e
+
+    if not isinstance(values, list) or len(values) != length:
+        raise ValueError("Malformed cursor")
+
+    return values
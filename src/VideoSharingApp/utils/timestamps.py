@@ -0,0 +1,17 @@
+"""
+Timestamp normalization.
+"""
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """
+    Mark a naive timestamp as UTC; aware timestamps and None pass through.
+
+    SQLite hands timestamps back without tzinfo even for timezone-aware
+    columns; everything is stored in UTC.
+    """
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# VideoSharingApp.database creates its engine on import; keep it off the real database
+os.environ.setdefault("DATABASE_DIR", tempfile.mkdtemp(prefix="videosharingapp-tests-"))
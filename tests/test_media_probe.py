@@ -0,0 +1,192 @@
+import struct
+
+import pytest
+
+from VideoSharingApp.utils.media_probe import MAX_METADATA_BOX_BYTES, MAX_PROBE_ELEMENTS, probe_media, sniff_mime
+
+
+# --- Synthetic files ---
+
+def png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr + b"\0" * 4
+
+
+def jpeg_segment(marker: int, payload: bytes) -> bytes:
+    return bytes([0xFF, marker]) + struct.pack(">H", len(payload) + 2) + payload
+
+
+def jpeg(width: int, height: int, sof: int = 0xC0, prefix: bytes = b"") -> bytes:
+    return (
+        b"\xff\xd8"
+        + prefix
+        + jpeg_segment(0xE0, b"JFIF\0" + b"\0" * 9)
+        + jpeg_segment(0xC4, b"\0" * 20)  # DHT: not a frame header despite the marker range
+        + jpeg_segment(sof, struct.pack(">BHHB", 8, height, width, 3) + b"\0" * 9)
+        + b"\xff\xd9"
+    )
+
+
+def box(box_type: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I4s", len(payload) + 8, box_type) + payload
+
+
+def mvhd(timescale: int, duration: int, version: int = 0) -> bytes:
+    if version == 1:
+        times = struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        times = struct.pack(">IIII", 0, 0, timescale, duration)
+    return box(b"mvhd", bytes([version, 0, 0, 0]) + times + b"\0" * 80)
+
+
+def tkhd(width: int, height: int) -> bytes:
+    return box(b"tkhd", b"\0" * 76 + struct.pack(">II", width << 16, height << 16))
+
+
+def mp4(*moov_children: bytes, brand: bytes = b"isom", before_moov: bytes = b"") -> bytes:
+    return box(b"ftyp", brand + b"\0\0\0\0" + brand) + before_moov + box(b"moov", b"".join(moov_children))
+
+
+def video_track(width: int, height: int) -> bytes:
+    return box(b"trak", tkhd(width, height) + box(b"mdia", b""))
+
+
+def element(element_id: bytes, payload: bytes) -> bytes:
+    size = len(payload)
+    encoded = bytes([0x80 | size]) if size < 0x7F else (0x4000 | size).to_bytes(2, "big")
+    return element_id + encoded + payload
+
+
+def webm(width: int, height: int, duration_ms: float, doc_type: bytes = b"webm", unknown_segment_size: bool = False) -> bytes:
+    header = element(b"\x1a\x45\xdf\xa3", element(b"\x42\x82", doc_type))
+    info = element(b"\x15\x49\xa9\x66", element(b"\x2a\xd7\xb1", (1_000_000).to_bytes(3, "big")) + element(b"\x44\x89", struct.pack(">d", duration_ms)))
+    video = element(b"\xe0", element(b"\xb0", width.to_bytes(2, "big")) + element(b"\xba", height.to_bytes(2, "big")))
+    tracks = element(b"\x16\x54\xae\x6b", element(b"\xae", element(b"\xd7", b"\x01") + video))
+    cluster = element(b"\x1f\x43\xb6\x75", b"\0" * 16)
+    body = info + tracks + cluster
+
+    if unknown_segment_size:
+        return header + b"\x18\x53\x80\x67" + b"\x01\xff\xff\xff\xff\xff\xff\xff" + body
+    return header + element(b"\x18\x53\x80\x67", body)
+
+
+def probe_bytes(tmp_path, data: bytes):
+    path = tmp_path / "media"
+    path.write_bytes(data)
+    return probe_media(str(path))
+
+
+# --- sniff_mime ---
+
+@pytest.mark.parametrize("header, expected", [
+    (b"\xff\xd8\xff\xe0" + b"\0" * 12, "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n" + b"\0" * 8, "image/png"),
+    (b"\0\0\0\x18ftypisom\0\0\0\0", "video/mp4"),
+    (b"\0\0\0\x14ftypqt  \0\0\0\0", "video/quicktime"),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x82\x84webm", "video/webm"),
+    (b"\x1a\x45\xdf\xa3\x9f\x42\x82\x88matroska", "video/x-matroska"),
+    (b"GIF89a" + b"\0" * 10, None),
+    (b"%PDF-1.7", None),
+    (b"\xff\xd8", None),
+    (b"", None),
+])
+def test_sniff_mime(header, expected):
+    assert sniff_mime(header) == expected
+
+
+# --- Valid headers ---
+
+@pytest.mark.parametrize("data, expected", [
+    (png(640, 480), ("image/png", 640, 480, None)),
+    (jpeg(400, 300), ("image/jpeg", 400, 300, None)),
+    (jpeg(1024, 768, sof=0xC2), ("image/jpeg", 1024, 768, None)),
+    (jpeg(32, 16, prefix=b"\xff"), ("image/jpeg", 32, 16, None)),  # fill byte before a marker
+    (mp4(mvhd(1000, 12345), video_track(1920, 1080)), ("video/mp4", 1920, 1080, 12.345)),
+    (mp4(mvhd(600, 1200, version=1), video_track(1280, 720)), ("video/mp4", 1280, 720, 2.0)),
+    (mp4(mvhd(1000, 500), video_track(0, 0), video_track(640, 360)), ("video/mp4", 640, 360, 0.5)),  # audio track first
+    (mp4(mvhd(1000, 1000), video_track(320, 240), brand=b"qt  "), ("video/quicktime", 320, 240, 1.0)),
+    (webm(1920, 1080, 5000.0), ("video/webm", 1920, 1080, 5.0)),
+    (webm(640, 480, 1500.0, doc_type=b"matroska"), ("video/x-matroska", 640, 480, 1.5)),
+    (webm(640, 480, 2500.0, unknown_segment_size=True), ("video/webm", 640, 480, 2.5)),
+])
+def test_probe_valid(tmp_path, data, expected):
+    metadata = probe_bytes(tmp_path, data)
+
+    assert (metadata.mime_type, metadata.width, metadata.height, metadata.duration_seconds) == expected
+    assert metadata.size_bytes == len(data)
+
+
+# --- Truncated files ---
+
+VALID_FILES = {
+    "png": png(640, 480),
+    "jpeg": jpeg(400, 300),
+    "mp4": mp4(mvhd(1000, 12345), video_track(1920, 1080)),
+    "webm": webm(1920, 1080, 5000.0),
+}
+
+
+@pytest.mark.parametrize("name", sorted(VALID_FILES))
+def test_probe_truncated(tmp_path, name):
+    data = VALID_FILES[name]
+    complete = probe_bytes(tmp_path, data)
+
+    for cut in range(1, len(data)):
+        metadata = probe_bytes(tmp_path, data[:cut])
+
+        assert metadata.size_bytes == cut
+        # Whatever was read must be correct; the rest is left unset
+        for field in ("width", "height", "duration_seconds"):
+            value = getattr(metadata, field)
+            assert value is None or value == getattr(complete, field), (cut, field)
+
+
+@pytest.mark.parametrize("data", [
+    b"\xff\xd8\xff",  # JPEG magic only
+    b"\xff\xd8\x00\x00",  # no marker after SOI
+    b"\x89PNG\r\n\x1a\n",  # PNG signature only
+    b"\0\0\0\x08ftyp",  # ftyp box and nothing else
+])
+def test_probe_header_only(tmp_path, data):
+    metadata = probe_bytes(tmp_path, data)
+
+    assert (metadata.width, metadata.height, metadata.duration_seconds) == (None, None, None)
+
+
+# --- Oversized and malformed boxes ---
+
+@pytest.mark.parametrize("data, expected", [
+    # moov claims far more bytes than the file has: clamped to the end of the file
+    (box(b"ftyp", b"isom\0\0\0\0") + struct.pack(">I4s", 2**31, b"moov") + mvhd(1000, 2000), (None, 2.0)),
+    # 64-bit box size past the end of the file
+    (box(b"ftyp", b"isom\0\0\0\0") + struct.pack(">I4sQ", 1, b"free", 2**62) + box(b"moov", mvhd(1000, 2000)), (None, None)),
+    # mvhd over MAX_METADATA_BOX_BYTES is not read into memory
+    (mp4(box(b"mvhd", b"\0" * (MAX_METADATA_BOX_BYTES + 1)), video_track(640, 360)), (640, None)),
+    # Box size smaller than its own header stops the walk
+    (box(b"ftyp", b"isom\0\0\0\0") + struct.pack(">I4s", 4, b"moov") + mvhd(1000, 2000), (None, None)),
+    # Size 0 means "to the end of the file"
+    (box(b"ftyp", b"isom\0\0\0\0") + struct.pack(">I4s", 0, b"moov") + mvhd(1000, 3000), (None, 3.0)),
+    # Zero timescale must not divide by zero
+    (mp4(mvhd(0, 1000), video_track(640, 360)), (640, None)),
+    # More boxes than MAX_PROBE_ELEMENTS before moov: gives up instead of walking them all
+    (mp4(mvhd(1000, 1000), before_moov=box(b"free", b"") * (MAX_PROBE_ELEMENTS + 1)), (None, None)),
+])
+def test_probe_mp4_malformed(tmp_path, data, expected):
+    metadata = probe_bytes(tmp_path, data)
+
+    assert (metadata.width, metadata.duration_seconds) == expected
+
+
+@pytest.mark.parametrize("data", [
+    # Invalid variable-length integer (no length marker bit)
+    b"\x1a\x45\xdf\xa3\x00" + b"\0" * 16,
+    # Element claiming a size far past the end of the file
+    b"\x1a\x45\xdf\xa3\x80" + b"\x18\x53\x80\x67\x08\x00\x00\x00\x00\x00\xff\xff" + b"\0" * 8,
+    # Unknown-size element that is not a container
+    b"\x1a\x45\xdf\xa3\x80" + b"\x18\x53\x80\x67\xff" + b"\x2a\xd7\xb1\xff" + b"\0" * 8,
+])
+def test_probe_ebml_malformed(tmp_path, data):
+    metadata = probe_bytes(tmp_path, data)
+
+    assert metadata.mime_type == "video/x-matroska"
+    assert (metadata.width, metadata.height, metadata.duration_seconds) == (None, None, None)
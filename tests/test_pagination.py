@@ -0,0 +1,67 @@
+import json
+import uuid
+import base64
+from datetime import datetime, timezone
+
+import pytest
+
+from VideoSharingApp.database import Post
+from VideoSharingApp.utils.pagination import decode_cursor, encode_cursor, keyset_value
+
+POST_ID = uuid.UUID("3df4496f-a928-439e-a3f4-9a023c7d5ff5")
+
+
+def b64(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+@pytest.mark.parametrize("values, decoded", [
+    # Feed: (stored created_at text, id)
+    (("2026-10-19 15:33:26", POST_ID), ["2026-10-19 15:33:26", str(POST_ID)]),
+    (("2026-10-19 15:33:26.123456", POST_ID), ["2026-10-19 15:33:26.123456", str(POST_ID)]),
+    # Feed on other databases: an aware datetime
+    ((datetime(2026, 10, 19, 15, 33, 26, tzinfo=timezone.utc), POST_ID), ["2026-10-19T15:33:26+00:00", str(POST_ID)]),
+    # Trending: (float score, id); floats must survive exactly
+    ((10.1234567, POST_ID), [10.1234567, str(POST_ID)]),
+    ((0.1 + 0.2, POST_ID), [0.1 + 0.2, str(POST_ID)]),
+    ((-3.5e-7, POST_ID), [-3.5e-7, str(POST_ID)]),
+    ((42,), [42]),
+    (("ünïcødé ✓",), ["ünïcødé ✓"]),
+])
+def test_cursor_round_trip(values, decoded):
+    cursor = encode_cursor(*values)
+
+    assert "=" not in cursor
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+    assert decode_cursor(cursor, len(values)) == decoded
+
+
+@pytest.mark.parametrize("cursor, length", [
+    ("", 2),
+    ("!!!!", 2),
+    ("not a cursor", 2),
+    ("é", 2),
+    (str(POST_ID), 2),  # the old bare-id cursor format
+    (b64(b"\xff\xfe\xfd"), 2),  # not UTF-8
+    (b64(b"{not json"), 2),
+    (b64(json.dumps({"a": 1}).encode()), 2),  # JSON, but not a list
+    (b64(json.dumps("text").encode()), 2),
+    (b64(json.dumps([1]).encode()), 2),  # wrong number of values
+    (b64(json.dumps([1, 2, 3]).encode()), 2),
+    (encode_cursor("2026-10-19 15:33:26", POST_ID), 1),
+])
+def test_decode_cursor_rejects_garbage(cursor, length):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, length)
+
+
+@pytest.mark.parametrize("value", [object(), b"bytes", {1, 2}])
+def test_encode_cursor_rejects_unsupported_values(value):
+    with pytest.raises(TypeError):
+        encode_cursor(value)
+
+
+def test_keyset_value_keeps_sqlite_timestamp_text():
+    # SQLite compares created_at as its stored text, so the cursor value is used as is
+    assert keyset_value(Post.created_at, "2026-10-19 15:33:26") == "2026-10-19 15:33:26"
+    assert keyset_value(Post.id, str(POST_ID)) == str(POST_ID)